@@ -0,0 +1,104 @@
+import asyncio
+import time
+from .utils.camera_protocol import FrameParser, create_auth_packet, create_ssl_context
+
+
+class AsyncCameraClient:
+    """asyncio client for a Bambu printer's camera.
+
+    Uses the same auth packet and FrameParser as CameraClient, but on
+    ``asyncio.open_connection``, so any number of streams can share one
+    event loop instead of needing a thread each.
+
+    Example:
+        async for frame in client.frames():
+            ...
+    """
+    def __init__(self, hostname, access_code, port=6000, read_size=65536):
+        """Initialize async camera client with connection details.
+
+        Args:
+            hostname: Printer's IP address or hostname
+            access_code: Printer's access code for authentication
+            port: Camera stream port (default: 6000)
+            read_size: Maximum bytes requested per read
+        """
+        self.hostname = hostname
+        self.port = port
+        self.username = "bblp"
+        self.auth_packet = bytes(create_auth_packet(self.username, access_code))
+        self.read_size = read_size
+        self.latest_frame = None
+        self.latest_frame_time = None
+        self.active_streams = 0
+
+    async def __connect__(self):
+        reader, writer = await asyncio.open_connection(
+            self.hostname, self.port,
+            ssl=create_ssl_context(), server_hostname=self.hostname,
+        )
+        writer.write(self.auth_packet)
+        await writer.drain()
+        return reader, writer
+
+    async def frames(self, frame_filter=None):
+        """Stream frames from the camera.
+
+        Args:
+            frame_filter: Function called with each frame as a memoryview;
+                frames for which it returns False are skipped before copying
+
+        Yields:
+            JPEG image data as bytes, until the connection closes
+        """
+        reader, writer = await self.__connect__()
+        parser = FrameParser()
+        self.active_streams += 1
+        try:
+            while True:
+                frame = parser.next_frame()
+                if frame is None:
+                    data = await reader.read(self.read_size)
+                    if not data:
+                        return
+                    parser.feed(data)
+                    continue
+                if frame_filter and not frame_filter(frame):
+                    continue
+                img = bytes(frame)
+                self.latest_frame = img
+                self.latest_frame_time = time.monotonic()
+                yield img
+        finally:
+            self.active_streams -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:  # Includes ConnectionError and ssl.SSLError
+                pass
+
+    async def snapshot(self, max_age=1.0):
+        """Return a single frame.
+
+        The newest cached frame (kept fresh while ``frames()`` is being
+        consumed) is returned if it is at most ``max_age`` seconds old;
+        otherwise a new connection is opened for the next frame.
+
+        Args:
+            max_age: Maximum age in seconds of a cached frame, or None to
+                accept any cached frame
+
+        Returns:
+            JPEG image data as bytes, or None if the connection closed first
+        """
+        if self.latest_frame is not None and (
+            max_age is None or time.monotonic() - self.latest_frame_time <= max_age
+        ):
+            return self.latest_frame
+
+        frames = self.frames()
+        try:
+            async for frame in frames:
+                return frame
+        finally:
+            await frames.aclose()
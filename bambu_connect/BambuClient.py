@@ -1,154 +1,332 @@
 import paho.mqtt.client as mqtt
+import json
 import ssl
+import threading
 import time
-from typing import Optional, Callable
+from typing import Dict, Iterable, List, Optional, Callable, Tuple
 from .CameraClient import CameraClient
-from .WatchClient import WatchClient
+from .WatchClient import WatchClient, CRITICAL_FIELDS
 from .ExecuteClient import ExecuteClient
 from .FileClient import FileClient
+from .utils.backoff import Backoff
 from .utils.models import PrinterStatus
 
+
+_ssl_context = None
+
+
+def _mqtt_ssl_context() -> ssl.SSLContext:
+    """SSL context shared by all clients; building one per client is slow."""
+    global _ssl_context
+    if _ssl_context is None:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        _ssl_context = context
+    return _ssl_context
+
+
 class BambuClient:
     """Main client interface for Bambu printer control."""
     
-    def __init__(self, hostname: str, access_code: str, serial: str):
+    def __init__(self, hostname: str, access_code: str, serial: str,
+                 blocking: bool = True, connect_timeout: float = 10,
+                 on_state_change: Optional[Callable[[str], None]] = None,
+                 backoff: Optional[Backoff] = None, resync: bool = True,
+                 command_timeout: float = 10, command_rate: Optional[float] = None,
+                 command_burst: int = 5):
         """Initialize the BambuClient with shared MQTT connection.
         
         Args:
             hostname: Printer's IP address or hostname
             access_code: Printer's access code for authentication
             serial: Printer's serial number
+            blocking: Wait for the MQTT connection before returning. With
+                False the connection is made in the background (and retried
+                until it succeeds); wait on ``ready`` for it.
+            connect_timeout: Seconds to wait when blocking
+            on_state_change: Function called with "connecting", "connected",
+                "disconnected" or "stopped" as the MQTT connection changes
+            backoff: Backoff controlling the delays between reconnect
+                attempts; jittered so a fleet does not reconnect in lockstep
+            resync: Request a full status push after every reconnect so the
+                watched status is rebuilt after a gap
+            command_timeout: Default seconds a command's future waits for
+                the printer's response
+            command_rate: Maximum commands per second, or None for no limit.
+                Limited commands are queued by priority (stop and pause
+                first, G-code last) and superseded speed and light commands
+                are dropped from the queue.
+            command_burst: Commands that may be sent back to back under
+                command_rate
         """
         self.hostname = hostname
         self.access_code = access_code
         self.serial = serial
         self.connected = False
+        self.ready = threading.Event()  # Set while the MQTT connection is up
+        self.connect_error = None
+        self.connection_state = "stopped"
+        self.on_state_change = on_state_change
+        self.backoff = backoff or Backoff(initial=1.0, maximum=60.0)
+        self.resync = resync
+        self.connect_count = 0
+        self.reconnect_count = 0
+        self.disconnect_count = 0
+        self.connect_failures = 0
+        self._cameraClient = None
+        self._fileClient = None
         
         # Create shared MQTT client
         self.mqtt_client = self._setup_mqtt_client()
         
-        # Initialize sub-clients with shared MQTT client
-        self.cameraClient = CameraClient(hostname, access_code)
+        # Initialize sub-clients with shared MQTT client; the camera and file
+        # clients are created on first use
         self.watchClient = WatchClient(hostname, access_code, serial, self.mqtt_client)
-        self.executeClient = ExecuteClient(hostname, access_code, serial, self.mqtt_client)
-        self.fileClient = FileClient(hostname, access_code, serial)
+        self.executeClient = ExecuteClient(hostname, access_code, serial, self.mqtt_client,
+                                           command_timeout, command_rate, command_burst)
+
+        self._connect(blocking, connect_timeout)
+
+    @property
+    def cameraClient(self) -> CameraClient:
+        if self._cameraClient is None:
+            self._cameraClient = CameraClient(self.hostname, self.access_code)
+        return self._cameraClient
+
+    @property
+    def fileClient(self) -> FileClient:
+        if self._fileClient is None:
+            self._fileClient = FileClient(self.hostname, self.access_code, self.serial)
+        return self._fileClient
 
     def _setup_mqtt_client(self) -> mqtt.Client:
-        """Configure and connect shared MQTT client."""
+        """Configure the shared MQTT client."""
         client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
         client.username_pw_set("bblp", self.access_code)
-        client.tls_set(tls_version=ssl.PROTOCOL_TLS, cert_reqs=ssl.CERT_NONE)
+        client.tls_set_context(_mqtt_ssl_context())
         client.tls_insecure_set(True)
         
         # Set up callbacks
         client.on_connect = self._on_connect
         client.on_disconnect = self._on_disconnect
-        
+        client.on_connect_fail = self._on_connect_fail
+        client.on_message = self._on_message
+        return client
+
+    def _connect(self, blocking: bool, timeout: float):
+        """Connect the shared MQTT client, waiting for it if blocking."""
+        client = self.mqtt_client
+        self.__set_state__("connecting")
+        if not blocking:
+            client.connect_async(self.hostname, 8883, 60)
+            client.loop_start()
+            return
+
         try:
             client.connect(self.hostname, 8883, 60)
             client.loop_start()
             
             # Wait for connection
-            timeout = 10
-            start_time = time.time()
-            while not self.connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
-            
-            if not self.connected:
-                raise ConnectionError("Failed to connect to printer")
-            
-            return client
+            if not self.ready.wait(timeout):
+                raise ConnectionError(self.connect_error or "Failed to connect to printer")
             
         except Exception as e:
-            if client:
-                client.loop_stop()
-                client.disconnect()
+            client.loop_stop()
+            client.disconnect()
+            self.__set_state__("stopped")
             raise ConnectionError(f"Failed to connect to printer: {str(e)}")
 
     def _on_connect(self, client, userdata, flags, rc):
         """Handle successful connection."""
         if rc == 0:
+            self.connect_count += 1
+            reconnected = self.connect_count > 1
+            if reconnected:
+                self.reconnect_count += 1
+            self.backoff.reset()
             self.connected = True
+            self.connect_error = None
+            self.ready.set()
+            self.__set_state__("connected")
+            # Subscriptions do not survive a reconnect, and ones made before
+            # the first connection were never sent. Command responses arrive
+            # on the report topic, so it is subscribed even when not watching
+            client.subscribe(f"device/{self.serial}/report")
+            self.watchClient.resubscribe()
+            if reconnected and self.resync and self.watchClient.active:
+                # Reports missed during the gap are lost; ask for a full one
+                self.executeClient.dump_info()
         else:
+            self.connect_error = mqtt.connack_string(rc)
             print(f"Connection failed with code {rc}")
             self.connected = False
 
+    def _on_message(self, client, userdata, msg):
+        """Decode a report once and route it to the command and watch clients."""
+        watching = self.watchClient.active
+        if not watching and not self.executeClient.pending:
+            return
+        try:
+            doc = json.loads(msg.payload)
+        except json.JSONDecodeError:
+            print("Warning: Failed to decode message payload")
+            return
+        if type(doc) is not dict:
+            return
+        if self.executeClient.pending:
+            try:
+                self.executeClient.handle_report(doc)
+            except Exception as e:
+                print(f"Warning: Error matching command response: {e}")
+        if watching:
+            self.watchClient.handle_report(doc)
+
     def _on_disconnect(self, client, userdata, rc):
         """Handle disconnection."""
         self.connected = False
+        self.ready.clear()
+        self.disconnect_count += 1
+        if rc == 0:  # Requested with disconnect()
+            self.__set_state__("stopped")
+            return
         print("Disconnected from printer")
+        self.__set_state__("disconnected")
+        self.__schedule_retry__(client)
+
+    def _on_connect_fail(self, client, userdata):
+        """Handle a failed (re)connection attempt."""
+        self.connect_failures += 1
+        self.__set_state__("disconnected")
+        self.__schedule_retry__(client)
+
+    def __schedule_retry__(self, client):
+        """Set paho's wait before its next reconnect attempt from the backoff.
+
+        paho calls the disconnect and connect-fail callbacks before it waits
+        min(previous wait * 2, max_delay), so pinning both bounds to a
+        freshly jittered delay here makes each attempt follow the backoff.
+        """
+        delay = self.backoff.next()
+        client.reconnect_delay_set(delay, delay)
+
+    def __set_state__(self, state):
+        """Record the MQTT connection state and notify the listener."""
+        if state == self.connection_state:
+            return
+        self.connection_state = state
+        if self.on_state_change:
+            try:
+                self.on_state_change(state)
+            except Exception as e:
+                print(f"Warning: Error in connection state callback: {e}")
+
+    def close(self):
+        """Disconnect from the printer and stop reconnecting."""
+        self.executeClient.close()
+        self.mqtt_client.disconnect()
+        self.mqtt_client.loop_stop()
+        self.__set_state__("stopped")
 
     def __del__(self):
         """Cleanup on deletion."""
         if hasattr(self, 'mqtt_client'):
-            self.mqtt_client.loop_stop()
-            self.mqtt_client.disconnect()
+            self.close()
 
     ############# Camera Wrappers #############
-    def start_camera_stream(self, img_callback):
-        self.cameraClient.start_stream(img_callback)
+    def start_camera_stream(self, img_callback, reconnect=False, stall_timeout=None,
+                            on_state_change=None, max_fps=None, every_nth=None,
+                            frame_filter=None):
+        self.cameraClient.start_stream(
+            img_callback, reconnect, stall_timeout, on_state_change,
+            max_fps=max_fps, every_nth=every_nth, frame_filter=frame_filter,
+        )
 
     def stop_camera_stream(self):
         self.cameraClient.stop_stream()
 
-    def capture_camera_frame(self):
-        return self.cameraClient.capture_frame()
+    def capture_camera_frame(self, max_age=None):
+        return self.cameraClient.capture_frame(max_age)
+
+    def start_camera_session(self, stall_timeout=10.0, on_state_change=None):
+        self.cameraClient.start_session(stall_timeout, on_state_change)
+
+    def stop_camera_session(self):
+        self.cameraClient.stop_session()
 
     ############# WatchClient Wrappers #############
     def start_watch_client(
         self,
         message_callback: Optional[Callable[[PrinterStatus], None]] = None,
         on_connect_callback: Optional[Callable[[], None]] = None,
+        incremental: bool = False,
+        dispatcher="inline",
+        max_rate: Optional[float] = None,
+        leading: bool = True,
+        trailing: bool = True,
+        critical_fields=CRITICAL_FIELDS,
+        lazy: bool = False,
     ):
-        self.watchClient.start(message_callback, on_connect_callback)
+        self.watchClient.start(message_callback, on_connect_callback, incremental, dispatcher,
+                               max_rate, leading, trailing, critical_fields, lazy)
 
     def stop_watch_client(self):
-        self.watchClient.stop()
+        # The report topic stays subscribed for command responses
+        self.watchClient.stop(unsubscribe=False)
+
+    def on_status_change(self, fields, callback):
+        """Call back with (old, new) values when the given status fields change."""
+        return self.watchClient.on_change(fields, callback)
 
     ############# ExecuteClient Wrappers #############
+    # Commands return a Future resolving to the printer's CommandResponse
     def set_chamber_light(self, on: bool):
         """Control the chamber light."""
-        self.executeClient.set_chamber_light(on)
+        return self.executeClient.set_chamber_light(on)
 
     def set_print_speed(self, speed_profile: str):
         """Set the print speed profile (silent/normal/sport/ludicrous)."""
-        self.executeClient.set_print_speed(speed_profile)
+        return self.executeClient.set_print_speed(speed_profile)
 
     def pause_print(self):
         """Pause the current print."""
-        self.executeClient.pause_print()
+        return self.executeClient.pause_print()
 
     def resume_print(self):
         """Resume the paused print."""
-        self.executeClient.resume_print()
+        return self.executeClient.resume_print()
 
     def stop_print(self):
         """Stop the current print."""
-        self.executeClient.stop_print()
+        return self.executeClient.stop_print()
 
     def send_gcode(self, gcode: str):
         """Send G-code command to printer."""
-        self.executeClient.send_gcode(gcode)
+        return self.executeClient.send_gcode(gcode)
+
+    def send_gcode_batch(self, gcode, max_bytes: int = 1024, window: int = 4, on_progress=None):
+        """Send a G-code file or lines in acknowledged batches; returns GcodeBatchStats."""
+        return self.executeClient.send_gcode_batch(gcode, max_bytes, window, on_progress)
 
     def start_print(self, file: str, use_ams: bool = False, enable_timelapse: bool = False):
         """Start printing specified file."""
-        self.executeClient.start_print(file, use_ams, enable_timelapse)
+        return self.executeClient.start_print(file, use_ams, enable_timelapse)
 
     def skip_objects(self, object_list: list):
         """Skip specified objects in current print."""
-        self.executeClient.skip_objects(object_list)
+        return self.executeClient.skip_objects(object_list)
 
     def get_version(self):
-        """Request printer version information."""
-        self.executeClient.get_version()
+        """Request printer version information; the future resolves to ModuleVersions by name."""
+        return self.executeClient.get_version()
 
     def dump_info(self):
         """Request full printer status dump."""
-        self.executeClient.dump_info()
+        return self.executeClient.dump_info()
 
     def start_monitoring(self):
         """Start continuous status monitoring."""
-        self.executeClient.start_monitoring()
+        return self.executeClient.start_monitoring()
 
     ############# FileClient Wrappers #############
     def get_files(self, path="/", extension=".3mf"):
@@ -160,3 +338,31 @@ class BambuClient:
         return self.fileClient.download_file(
             remote_path, local_path=local_path, verbose=verbose
         )
+
+
+def connect_all(printers: Iterable[Dict[str, str]], timeout: float = 10
+                ) -> Tuple[List[BambuClient], List[BambuClient]]:
+    """Connect to many printers in parallel.
+
+    Every client starts connecting in the background at once, then all of
+    them share a single deadline, so offline printers cost ``timeout`` in
+    total rather than each.
+
+    Args:
+        printers: Keyword arguments for BambuClient (hostname, access_code,
+            serial) for each printer
+        timeout: Seconds to wait for all connections
+
+    Returns:
+        (connected, pending) clients; pending ones keep retrying in the
+        background and set ``ready`` once they connect
+    """
+    clients = [BambuClient(**printer, blocking=False) for printer in printers]
+    deadline = time.monotonic() + timeout
+    connected, pending = [], []
+    for client in clients:
+        if client.ready.wait(max(0.0, deadline - time.monotonic())):
+            connected.append(client)
+        else:
+            pending.append(client)
+    return connected, pending
@@ -0,0 +1,214 @@
+import collections
+import threading
+import time
+
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class Subscription:
+    """Bounded frame queue attached to a CameraBroadcaster.
+
+    Frames can either be pulled with ``get()``/iteration or, when a callback
+    is given, are delivered by a dedicated worker thread so a slow consumer
+    only ever delays itself.
+    """
+    def __init__(self, broadcaster, callback=None, maxsize=2, policy=DROP_OLDEST,
+                 block_timeout=1.0):
+        """Initialize subscription.
+
+        Args:
+            broadcaster: Owning CameraBroadcaster
+            callback: Function called with each frame, or None to pull frames
+            maxsize: Maximum number of queued frames
+            policy: What to do when the queue is full: "drop_oldest",
+                "drop_newest" or "block"
+            block_timeout: With "block", how long the reader may wait for
+                room before the frame is dropped for this subscriber
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.broadcaster = broadcaster
+        self.callback = callback
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._worker = None
+        if callback:
+            self._worker = threading.Thread(target=self.__run__, daemon=True)
+            self._worker.start()
+
+    def put(self, frame):
+        """Queue a frame according to the subscription's policy."""
+        with self._condition:
+            if self.closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                if self.policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                elif not self._condition.wait_for(
+                    lambda: len(self._queue) < self.maxsize or self.closed,
+                    self.block_timeout,
+                ) or self.closed:
+                    self.dropped += 1
+                    return
+            self._queue.append(frame)
+            self._condition.notify_all()
+
+    def get(self, timeout=None):
+        """Return the next queued frame.
+
+        Args:
+            timeout: Seconds to wait, or None to wait until a frame arrives
+
+        Returns:
+            JPEG image data as bytes, or None on timeout or after close
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._queue or self.closed, timeout):
+                return None
+            if not self._queue:
+                return None
+            frame = self._queue.popleft()
+            self.delivered += 1
+            self._condition.notify_all()
+            return frame
+
+    def __iter__(self):
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    @property
+    def depth(self):
+        """Number of frames currently waiting in the queue."""
+        return len(self._queue)
+
+    def close(self):
+        """Detach from the broadcaster and stop the worker thread."""
+        self.broadcaster.unsubscribe(self)
+
+    def __close__(self):
+        with self._condition:
+            self.closed = True
+            self._queue.clear()
+            self._condition.notify_all()
+        if self._worker and self._worker is not threading.current_thread():
+            self._worker.join()
+
+    def __run__(self):
+        for frame in self:
+            try:
+                self.callback(frame)
+            except Exception as e:
+                print(f"Warning: Error in camera subscriber: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CameraBroadcaster:
+    """Share one camera connection between any number of subscribers.
+
+    The CameraClient stream thread only copies each frame reference into the
+    subscribers' bounded queues; consumers run on their own threads (or pull
+    frames themselves), so a slow subscriber never stalls the socket reader
+    or the other subscribers.
+    """
+    def __init__(self, camera_client):
+        """Initialize broadcaster.
+
+        Args:
+            camera_client: CameraClient providing the upstream stream
+        """
+        self.camera_client = camera_client
+        self._subscribers = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback=None, maxsize=2, policy=DROP_OLDEST, block_timeout=1.0):
+        """Attach a new subscriber.
+
+        Args:
+            callback: Function called with each frame on the subscriber's
+                own thread, or None to pull frames from the subscription
+            maxsize: Maximum number of frames queued for this subscriber
+            policy: "drop_oldest", "drop_newest" or "block". "block" lets the
+                subscriber hold the reader back for up to block_timeout per
+                frame, so only use it for consumers that must see every frame.
+            block_timeout: Maximum wait per frame with the "block" policy
+
+        Returns:
+            Subscription instance
+        """
+        subscription = Subscription(self, callback, maxsize, policy, block_timeout)
+        with self._lock:
+            self._subscribers += (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Detach a subscriber and stop its worker thread."""
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+        subscription.__close__()
+
+    @property
+    def subscribers(self):
+        """Currently attached subscriptions."""
+        return self._subscribers
+
+    @property
+    def latest_frame(self):
+        """Newest frame received from the printer."""
+        return self.camera_client.latest_frame
+
+    @property
+    def latest_frame_age(self):
+        """Seconds since the newest frame was received, or None before the first."""
+        frame_time = self.camera_client.latest_frame_time
+        return None if frame_time is None else time.monotonic() - frame_time
+
+    def start(self, reconnect=True, stall_timeout=10.0, on_state_change=None, backoff=None):
+        """Start the upstream camera stream.
+
+        Args:
+            reconnect: Whether to reconnect with backoff when the connection ends
+            stall_timeout: Seconds without data before a stalled connection is dropped
+            on_state_change: Function called with each connection state change
+            backoff: Backoff controlling the reconnect delays
+        """
+        self.camera_client.start_stream(self.publish, reconnect=reconnect,
+                                        stall_timeout=stall_timeout,
+                                        on_state_change=on_state_change, backoff=backoff)
+
+    def stop(self):
+        """Stop the upstream stream and detach all subscribers."""
+        if self.camera_client.streaming:
+            self.camera_client.stop_stream()
+        for subscription in self._subscribers:
+            self.unsubscribe(subscription)
+
+    def publish(self, frame):
+        """Hand a frame to every subscriber."""
+        for subscription in self._subscribers:
+            subscription.put(frame)
@@ -1,8 +1,10 @@
-from datetime import datetime
-import struct
 import socket
 import ssl
 import threading
+import time
+from .utils.backoff import Backoff
+from .utils.camera_protocol import FrameParser, create_auth_packet, create_ssl_context
+from .utils.frame_pipeline import FrameRateLimiter, OffloadedCallback, chain_filters
 
 
 class CameraClient:
@@ -24,6 +26,12 @@ class CameraClient:
         self.auth_packet = self.__create_auth_packet__(self.username, access_code)
         self.streaming = False
         self.stream_thread = None
+        self.latest_frame = None
+        self.latest_frame_time = None
+        self._frame_condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self.connection_state = "stopped"
+        self.reconnect_count = 0
 
     def __create_auth_packet__(self, username, access_code):
         """Create authentication packet for camera stream access.
@@ -35,105 +43,177 @@ class CameraClient:
         Returns:
             Formatted authentication packet as bytearray
         """
-        auth_data = bytearray()
-        auth_data += struct.pack("<I", 0x40)  # '@'\0\0\0
-        auth_data += struct.pack("<I", 0x3000)  # \0'0'\0\0
-        auth_data += struct.pack("<I", 0)  # \0\0\0\0
-        auth_data += struct.pack("<I", 0)  # \0\0\0\0
-        for i in range(0, len(username)):
-            auth_data += struct.pack("<c", username[i].encode('ascii'))
-        for i in range(0, 32 - len(username)):
-            auth_data += struct.pack("<x")
-        for i in range(0, len(access_code)):
-            auth_data += struct.pack("<c", access_code[i].encode('ascii'))
-        for i in range(0, 32 - len(access_code)):
-            auth_data += struct.pack("<x")
-        return auth_data
-
-    def __find_jpeg__(self, buf, start_marker, end_marker):
-        """Find complete JPEG image in buffer using markers.
-        
-        Args:
-            buf: Data buffer to search
-            start_marker: JPEG start marker sequence
-            end_marker: JPEG end marker sequence
-            
-        Returns:
-            Tuple of (JPEG image if found, remaining buffer)
-        """
-        start = buf.find(start_marker)
-        end = buf.find(end_marker, start + len(start_marker))
-        if start != -1 and end != -1:
-            return buf[start : end + len(end_marker)], buf[end + len(end_marker) :]
-        return None, buf
+        return create_auth_packet(username, access_code)
 
-    def capture_frame(self):
+    def capture_frame(self, max_age=None, timeout=10.0):
         """Capture single frame from camera stream.
         
+        While a stream or session is running the newest cached frame is
+        returned without touching the network. Otherwise a new connection
+        is opened and the next frame is grabbed.
+        
+        Args:
+            max_age: Maximum age in seconds of a cached frame; older frames
+                trigger a fresh grab. None accepts any cached frame.
+            timeout: Seconds to wait for the first frame of a running session
+            
         Returns:
             JPEG image data as bytes
         """
-        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
+        if self.streaming:
+            with self._frame_condition:
+                if self.latest_frame is None:
+                    self._frame_condition.wait_for(
+                        lambda: self.latest_frame is not None or not self.streaming,
+                        timeout,
+                    )
+                frame, frame_time = self.latest_frame, self.latest_frame_time
+            if frame is not None and (
+                max_age is None or time.monotonic() - frame_time <= max_age
+            ):
+                return frame
+        return self.__grab_frame__()
 
-        jpeg_start = bytearray([0xff, 0xd8, 0xff, 0xe0])
-        jpeg_end = bytearray([0xff, 0xd9])
-        read_chunk_size = 4096
+    def __grab_frame__(self):
+        """Open a one-off connection and return the next frame."""
+        ctx = create_ssl_context()
+        parser = FrameParser()
 
         with socket.create_connection((self.hostname, self.port)) as sock:
             with ctx.wrap_socket(sock, server_hostname=self.hostname) as ssock:
                 ssock.write(self.auth_packet)
-                buf = bytearray()
-                while True:
-                    dr = ssock.recv(read_chunk_size)
-                    if not dr:
-                        break
-                    buf += dr
-                    img, buf = self.__find_jpeg__(buf, jpeg_start, jpeg_end)
-                    if img:
-                        return bytes(img)
+                frame = parser.read_frame(ssock)
+                if frame is not None:
+                    img = bytes(frame)
+                    self.__store_frame__(img)
+                    return img
+
+    def __store_frame__(self, img):
+        """Make img the newest cached frame and wake up waiting readers."""
+        with self._frame_condition:
+            self.latest_frame = img
+            self.latest_frame_time = time.monotonic()
+            self._frame_condition.notify_all()
 
-    def capture_stream(self, img_callback):
+    def capture_stream(self, img_callback=None, reconnect=False, stall_timeout=None,
+                       on_state_change=None, backoff=None, frame_filter=None):
         """Continuously capture frames and pass to callback.
         
+        Every frame also becomes the cached ``latest_frame``. With
+        ``reconnect`` the stream is supervised: after a drop, an error or a
+        stall it reconnects and re-authenticates, waiting a jittered,
+        exponentially growing delay between attempts.
+        
         Args:
-            img_callback: Function to handle each captured frame
+            img_callback: Function to handle each captured frame, or None to
+                only keep the cache up to date
+            reconnect: Whether to reconnect instead of returning when the
+                connection ends
+            stall_timeout: Seconds without data after which the connection
+                is considered stalled and dropped; None waits forever
+            on_state_change: Function called with "connecting", "connected",
+                "stalled", "disconnected" or "stopped"
+            backoff: Backoff controlling the reconnect delays
+            frame_filter: Function called with each frame as a memoryview
+                before it is copied; frames for which it returns False are
+                dropped and do not update ``latest_frame``
         """
-        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
+        backoff = backoff or Backoff()
+        try:
+            while self.streaming:
+                self.__set_state__("connecting", on_state_change)
+                try:
+                    self.__stream_connection__(img_callback, stall_timeout,
+                                               on_state_change, backoff, frame_filter)
+                    state = "disconnected"
+                except socket.timeout:
+                    if not reconnect:
+                        raise
+                    state = "stalled"
+                except (OSError, ssl.SSLError) as e:
+                    if not reconnect:
+                        raise
+                    print(f"Camera stream error: {e}")
+                    state = "disconnected"
 
-        jpeg_start = bytearray([0xff, 0xd8, 0xff, 0xe0])
-        jpeg_end = bytearray([0xff, 0xd9])
-        read_chunk_size = 4096
+                if not self.streaming:
+                    break
+                self.__set_state__(state, on_state_change)
+                if not reconnect or self._stop_event.wait(backoff.next()):
+                    break
+                self.reconnect_count += 1
+        finally:
+            self.streaming = False
+            self.__set_state__("stopped", on_state_change)
 
-        with socket.create_connection((self.hostname, self.port)) as sock:
+    def __stream_connection__(self, img_callback, stall_timeout, on_state_change, backoff,
+                              frame_filter):
+        """Authenticate on a new connection and read frames until it ends."""
+        ctx = create_ssl_context()
+        parser = FrameParser()
+
+        with socket.create_connection((self.hostname, self.port), timeout=stall_timeout) as sock:
             with ctx.wrap_socket(sock, server_hostname=self.hostname) as ssock:
                 ssock.write(self.auth_packet)
-                buf = bytearray()
+                self.__set_state__("connected", on_state_change)
                 while self.streaming:
-                    dr = ssock.recv(read_chunk_size)
-                    if not dr:
+                    frame = parser.read_frame(ssock)
+                    if frame is None:
                         break
-                    buf += dr
-                    img, buf = self.__find_jpeg__(buf, jpeg_start, jpeg_end)
-                    if img:
-                        img_callback(bytes(img))
+                    backoff.reset()
+                    if frame_filter and not frame_filter(frame):
+                        continue
+                    img = bytes(frame)
+                    self.__store_frame__(img)
+                    if img_callback:
+                        img_callback(img)
+
+    def __set_state__(self, state, on_state_change):
+        """Record the stream's connection state and notify the listener."""
+        if state == self.connection_state:
+            return
+        self.connection_state = state
+        if on_state_change:
+            try:
+                on_state_change(state)
+            except Exception as e:
+                print(f"Warning: Error in camera state callback: {e}")
 
-    def start_stream(self, img_callback):
+    def start_stream(self, img_callback, reconnect=False, stall_timeout=None,
+                     on_state_change=None, backoff=None, max_fps=None, every_nth=None,
+                     executor=None, max_pending=2, frame_filter=None):
         """Start continuous camera stream in background thread.
         
         Args:
-            img_callback: Function to handle each captured frame
+            img_callback: Function to handle each captured frame, or None
+            reconnect: Whether to reconnect with backoff when the connection ends
+            stall_timeout: Seconds without data before a stalled connection is dropped
+            on_state_change: Function called with each connection state change
+            backoff: Backoff controlling the reconnect delays
+            max_fps: Maximum frames per second to deliver; the rest are
+                dropped before being copied out of the receive buffer
+            every_nth: Deliver only every n-th frame
+            executor: Optional thread or process pool executor to run
+                img_callback on instead of the socket thread
+            max_pending: Frames allowed in flight on the executor before new
+                frames are dropped
+            frame_filter: Additional filter applied after the rate limits
         """
         if self.streaming:
             print("Stream already running.")
             return
 
         self.streaming = True
+        self._stop_event.clear()
+        if max_fps or every_nth:
+            frame_filter = chain_filters(FrameRateLimiter(max_fps, every_nth), frame_filter)
+        if executor and img_callback:
+            img_callback = OffloadedCallback(img_callback, executor, max_pending)
+
         self.stream_thread = threading.Thread(
-            target=self.capture_stream, args=(img_callback,)
+            target=self.capture_stream,
+            args=(img_callback, reconnect, stall_timeout, on_state_change, backoff,
+                  frame_filter),
         )
         self.stream_thread.start()
 
@@ -144,4 +224,26 @@ class CameraClient:
             return
 
         self.streaming = False
-        self.stream_thread.join()
\ No newline at end of file
+        self._stop_event.set()
+        if self.stream_thread and self.stream_thread is not threading.current_thread():
+            self.stream_thread.join()
+        with self._frame_condition:
+            self._frame_condition.notify_all()
+
+    def start_session(self, stall_timeout=10.0, on_state_change=None, backoff=None):
+        """Keep a long-lived connection open to serve ``capture_frame`` from cache.
+        
+        The connection is supervised, so the session survives printer
+        reboots and network drops instead of falling back to one-shot grabs.
+        
+        Args:
+            stall_timeout: Seconds without data before a stalled connection is dropped
+            on_state_change: Function called with each connection state change
+            backoff: Backoff controlling the reconnect delays
+        """
+        self.start_stream(None, reconnect=True, stall_timeout=stall_timeout,
+                          on_state_change=on_state_change, backoff=backoff)
+
+    def stop_session(self):
+        """Close the long-lived connection opened by ``start_session``."""
+        self.stop_stream()
@@ -0,0 +1,349 @@
+import heapq
+import ipaddress
+import itertools
+import selectors
+import socket
+import ssl
+import threading
+import time
+from .utils.backoff import Backoff
+from .utils.camera_protocol import FrameParser, create_ssl_context
+
+
+def _resolve(hostname, port):
+    """Return (family, address) to connect to a camera; this can block on DNS."""
+    family, _, _, _, address = socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)[0]
+    return family, address
+
+
+def _is_ip_address(hostname):
+    try:
+        ipaddress.ip_address(hostname)
+        return True
+    except ValueError:
+        return False
+
+
+class _Stream:
+    """Connection state for one camera handled by a multiplexer loop."""
+    def __init__(self, camera_client, img_callback, frame_filter, ctx, address, reconnect=True,
+                 backoff=None, on_state_change=None):
+        self.camera_client = camera_client
+        self.family, self.address = address
+        self.resolving = False
+        self.img_callback = img_callback
+        self.frame_filter = frame_filter
+        self.ctx = ctx
+        self.reconnect = reconnect
+        self.backoff = backoff or Backoff()
+        self.on_state_change = on_state_change
+        self.__connect__()
+
+    def __connect__(self):
+        """Start a new non-blocking connection attempt."""
+        camera_client = self.camera_client
+        self.parser = FrameParser()
+        self.outgoing = bytes(camera_client.auth_packet)
+        self.connecting = True
+        self.handshaking = True
+        # Uses the address resolved beforehand: a DNS lookup here would
+        # block every other stream on the loop
+        self.sock = socket.socket(self.family, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.sock.connect_ex(self.address)
+
+    def __resolve__(self, loop):
+        """Look the camera's hostname up again on a helper thread.
+
+        The printer's address may have changed since the connection dropped;
+        the result is handed back to the loop thread before the next attempt
+        uses it.
+        """
+        if self.resolving or _is_ip_address(self.camera_client.hostname):
+            return
+        self.resolving = True
+        threading.Thread(target=self.__lookup__, args=(loop,), daemon=True,
+                         name=f"CameraResolve-{self.camera_client.hostname}").start()
+
+    def __lookup__(self, loop):
+        try:
+            address = _resolve(self.camera_client.hostname, self.camera_client.port)
+        except OSError:
+            address = None  # Keep the last known address
+        loop.call_soon(self.__resolved__, address)
+
+    def __resolved__(self, address):
+        self.resolving = False
+        if address is not None:
+            self.family, self.address = address
+
+    def set_state(self, state):
+        self.camera_client.__set_state__(state, self.on_state_change)
+
+
+class _Loop:
+    """One selector thread driving a share of the multiplexer's streams."""
+    def __init__(self, name, on_stream_ended=None):
+        self.selector = selectors.DefaultSelector()
+        self.streams = {}
+        self.pending = []
+        self.retries = []  # heap of (time, order, stream) waiting to reconnect
+        self._order = itertools.count()
+        self.on_stream_ended = on_stream_ended
+        self.lock = threading.Lock()
+        self.running = False
+        self.waker_r, self.waker_w = socket.socketpair()
+        self.waker_r.setblocking(False)
+        self.selector.register(self.waker_r, selectors.EVENT_READ, None)
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+
+    def call_soon(self, fn, *args):
+        with self.lock:
+            self.pending.append((fn, args))
+        try:
+            self.waker_w.send(b"\0")
+        except OSError:
+            pass
+
+    def run(self):
+        while self.running:
+            timeout = None
+            if self.retries:
+                timeout = max(0.0, self.retries[0][0] - time.monotonic())
+            for key, events in self.selector.select(timeout):
+                stream = key.data
+                if stream is None:
+                    self.__drain_waker__()
+                elif self.streams.get(stream.camera_client) is stream:
+                    self.__service__(stream)
+            self.__retry_due__()
+        for stream in list(self.streams.values()):
+            self.close(stream)
+        self.selector.close()
+        self.waker_r.close()
+        self.waker_w.close()
+
+    def __drain_waker__(self):
+        try:
+            while self.waker_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        with self.lock:
+            pending, self.pending = self.pending, []
+        for fn, args in pending:
+            fn(*args)
+
+    def add(self, stream):
+        self.streams[stream.camera_client] = stream
+        stream.set_state("connecting")
+        self.selector.register(stream.sock, selectors.EVENT_WRITE, stream)
+
+    def remove(self, camera_client):
+        stream = self.streams.get(camera_client)
+        if stream:
+            self.close(stream)
+
+    def close(self, stream):
+        """Close a stream for good."""
+        self.streams.pop(stream.camera_client, None)
+        self.__disconnect__(stream)
+        stream.camera_client.streaming = False
+        with stream.camera_client._frame_condition:
+            stream.camera_client._frame_condition.notify_all()
+        stream.set_state("stopped")
+
+    def __disconnect__(self, stream):
+        try:
+            self.selector.unregister(stream.sock)
+        except (KeyError, ValueError):
+            pass
+        stream.sock.close()
+
+    def __fail__(self, stream, message):
+        """Handle a dropped connection: reconnect after a backoff delay or give up."""
+        print(f"Camera stream from {stream.camera_client.hostname} {message}")
+        if not stream.reconnect:
+            self.close(stream)
+            if self.on_stream_ended:
+                self.on_stream_ended(stream.camera_client, self)
+            return
+        self.__disconnect__(stream)
+        stream.set_state("disconnected")
+        stream.__resolve__(self)
+        heapq.heappush(self.retries, (time.monotonic() + stream.backoff.next(),
+                                      next(self._order), stream))
+
+    def __retry_due__(self):
+        now = time.monotonic()
+        while self.retries and self.retries[0][0] <= now:
+            _, _, stream = heapq.heappop(self.retries)
+            if self.streams.get(stream.camera_client) is not stream:
+                continue  # Removed while waiting
+            stream.camera_client.reconnect_count += 1
+            try:
+                stream.__connect__()
+            except OSError as e:
+                self.__fail__(stream, f"failed: {e}")
+                continue
+            stream.set_state("connecting")
+            self.selector.register(stream.sock, selectors.EVENT_WRITE, stream)
+
+    def __service__(self, stream):
+        try:
+            if stream.connecting:
+                error = stream.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    raise OSError(error, "connect failed")
+                self.selector.unregister(stream.sock)
+                stream.sock = stream.ctx.wrap_socket(
+                    stream.sock,
+                    server_hostname=stream.camera_client.hostname,
+                    do_handshake_on_connect=False,
+                )
+                stream.connecting = False
+                self.selector.register(stream.sock, selectors.EVENT_WRITE, stream)
+            if stream.handshaking:
+                stream.sock.do_handshake()
+                stream.handshaking = False
+            if stream.outgoing:
+                sent = stream.sock.send(stream.outgoing)
+                stream.outgoing = stream.outgoing[sent:]
+                if stream.outgoing:
+                    self.__want__(stream, selectors.EVENT_WRITE)
+                    return
+                self.__want__(stream, selectors.EVENT_READ)
+                stream.set_state("connected")
+            self.__read__(stream)
+        except ssl.SSLWantReadError:
+            self.__want__(stream, selectors.EVENT_READ)
+        except ssl.SSLWantWriteError:
+            self.__want__(stream, selectors.EVENT_WRITE)
+        except (OSError, ssl.SSLError) as e:
+            self.__fail__(stream, f"failed: {e}")
+
+    def __read__(self, stream):
+        parser = stream.parser
+        # Drain the socket (and OpenSSL's buffer) until it would block
+        while True:
+            nbytes = stream.sock.recv_into(parser.get_buffer())
+            if not nbytes:
+                self.__fail__(stream, "closed")
+                return
+            parser.advance(nbytes)
+            frame = parser.next_frame()
+            if frame is not None:
+                stream.backoff.reset()
+            while frame is not None:
+                if stream.frame_filter and not stream.frame_filter(frame):
+                    frame = parser.next_frame()
+                    continue
+                img = bytes(frame)
+                stream.camera_client.__store_frame__(img)
+                if stream.img_callback:
+                    try:
+                        stream.img_callback(img)
+                    except Exception as e:
+                        print(f"Warning: Error in camera callback: {e}")
+                frame = parser.next_frame()
+
+    def __want__(self, stream, events):
+        if self.selector.get_key(stream.sock).events != events:
+            self.selector.modify(stream.sock, events, stream)
+
+
+class CameraMultiplexer:
+    """Drive many camera streams from one thread or a small fixed pool.
+
+    Instead of one blocking reader thread per printer, every camera socket
+    is non-blocking and serviced by a ``selectors`` loop. Streams are spread
+    round-robin over ``threads`` loops. Callbacks keep the CameraClient
+    semantics: each is called with a JPEG frame as bytes, in order, and the
+    client's ``latest_frame`` cache is kept up to date. Callbacks run on the
+    loop thread, so slow consumers should hand frames off (for example via
+    a CameraBroadcaster subscription). Dropped connections are reconnected
+    with backoff unless ``reconnect`` is False, in which case the camera is
+    removed from the multiplexer.
+    """
+    def __init__(self, threads=1):
+        """Initialize multiplexer.
+
+        Args:
+            threads: Number of selector threads to spread streams across
+        """
+        if threads < 1:
+            raise ValueError("threads must be at least 1")
+        self.ctx = create_ssl_context()
+        self.loops = [_Loop(f"CameraMultiplexer-{i}", self.__stream_ended__)
+                      for i in range(threads)]
+        self.assignments = {}
+        self._lock = threading.Lock()
+        self.running = False
+        self._next_loop = 0
+
+    def add(self, camera_client, img_callback=None, frame_filter=None, reconnect=True,
+            backoff=None, on_state_change=None):
+        """Start streaming from a camera.
+
+        Args:
+            camera_client: CameraClient with the printer's connection details
+            img_callback: Function to handle each captured frame, or None
+            frame_filter: Function called with each frame as a memoryview;
+                frames for which it returns False are dropped before copying
+            reconnect: Whether to reconnect with backoff when the connection
+                ends; otherwise the camera is removed
+            backoff: Backoff controlling the reconnect delays
+            on_state_change: Function called with "connecting", "connected",
+                "disconnected" or "stopped"
+
+        The hostname is resolved here, on the calling thread, so a slow DNS
+        lookup never stalls the selector loops; a failed lookup raises
+        OSError.
+        """
+        address = _resolve(camera_client.hostname, camera_client.port)
+        with self._lock:
+            if camera_client in self.assignments:
+                raise ValueError(f"Camera {camera_client.hostname} is already multiplexed")
+            if camera_client.streaming:
+                raise ValueError(f"Camera {camera_client.hostname} is already streaming")
+            stream = _Stream(camera_client, img_callback, frame_filter, self.ctx, address,
+                             reconnect, backoff, on_state_change)
+            loop = self.loops[self._next_loop % len(self.loops)]
+            self._next_loop += 1
+            self.assignments[camera_client] = loop
+            # capture_frame serves the cache while streaming is set
+            camera_client.streaming = True
+        loop.call_soon(loop.add, stream)
+
+    def remove(self, camera_client):
+        """Stop streaming from a camera."""
+        with self._lock:
+            loop = self.assignments.pop(camera_client, None)
+        if loop:
+            loop.call_soon(loop.remove, camera_client)
+
+    def __stream_ended__(self, camera_client, loop):
+        """Forget a camera whose stream ended without reconnecting."""
+        with self._lock:
+            if self.assignments.get(camera_client) is loop:
+                del self.assignments[camera_client]
+
+    def start(self):
+        """Start the selector threads."""
+        self.running = True
+        for loop in self.loops:
+            loop.running = True
+            loop.thread.start()
+
+    def stop(self):
+        """Close every stream and stop the selector threads."""
+        self.running = False
+        for loop in self.loops:
+            loop.call_soon(setattr, loop, "running", False)
+        for loop in self.loops:
+            if loop.thread.is_alive():
+                loop.thread.join()
+        with self._lock:
+            for camera_client in self.assignments:
+                camera_client.streaming = False  # Also those never picked up by a loop
+            self.assignments.clear()
@@ -0,0 +1,310 @@
+import array
+import bisect
+import errno
+import mmap
+import os
+import struct
+import threading
+import time
+
+
+RECORD_MAGIC = 0x52434D42  # "BMCR"
+_RECORD_HEADER = struct.Struct("<IdI")  # magic, timestamp, payload length
+_TERMINATOR = bytes(_RECORD_HEADER.size)
+_ZEROS = bytes(1024 * 1024)
+
+
+def _reserve(file, size):
+    """Allocate the disk blocks of the first size bytes of file.
+
+    A sparse file only takes disk space when its pages are first written,
+    and a full disk then kills the process with SIGBUS on a write through
+    the mmap. Reserving the space up front surfaces it as OSError here.
+    """
+    current = os.fstat(file.fileno()).st_size
+    if current > size:
+        file.truncate(size)
+        current = size
+    if hasattr(os, "posix_fallocate"):
+        try:
+            # Also fills holes in files left sparse by earlier versions
+            os.posix_fallocate(file.fileno(), 0, size)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP, getattr(errno, "ENOTSUP", None)):
+                raise
+    # No fallocate on this platform or file system: write zeros past the
+    # existing data, which the file system must find blocks for
+    file.seek(current)
+    while current < size:
+        current += file.write(_ZEROS[:size - current])
+    file.flush()
+    os.fsync(file.fileno())
+
+
+class _Segment:
+    """One fixed-size, memory-mapped segment file and its frame index."""
+    def __init__(self, path, size):
+        self.path = path
+        exists = os.path.exists(path)
+        self.file = open(path, "r+b" if exists else "w+b")
+        try:
+            _reserve(self.file, size)
+            self.mmap = mmap.mmap(self.file.fileno(), size)
+        except BaseException:
+            self.file.close()
+            raise
+        self.timestamps = array.array("d")
+        self.offsets = array.array("Q")
+        self.count = 0
+        self.write_pos = 0
+        self.generation = 0
+
+    def add(self, timestamp, offset):
+        # Reuse index slots from the previous cycle instead of reallocating
+        if self.count < len(self.timestamps):
+            self.timestamps[self.count] = timestamp
+            self.offsets[self.count] = offset
+        else:
+            self.timestamps.append(timestamp)
+            self.offsets.append(offset)
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+        self.write_pos = 0
+        self.generation += 1
+        self.mmap[:_RECORD_HEADER.size] = _TERMINATOR
+
+    def scan(self):
+        """Rebuild the index from the records already on disk."""
+        self.count = 0
+        pos = 0
+        size = len(self.mmap)
+        while pos + _RECORD_HEADER.size <= size:
+            magic, timestamp, length = _RECORD_HEADER.unpack_from(self.mmap, pos)
+            end = pos + _RECORD_HEADER.size + length
+            if magic != RECORD_MAGIC or end > size:
+                break
+            self.add(timestamp, pos)
+            pos = end
+        self.write_pos = pos
+
+    @property
+    def first_time(self):
+        return self.timestamps[0] if self.count else None
+
+    @property
+    def last_time(self):
+        return self.timestamps[self.count - 1] if self.count else None
+
+    def close(self):
+        self.mmap.flush()
+        self.mmap.close()
+        self.file.close()
+
+
+class CameraRecorder:
+    """Ring recorder keeping the most recent camera frames on disk.
+
+    Frames are appended to a fixed set of preallocated, memory-mapped
+    segment files that are recycled oldest-first, so disk use is bounded by
+    ``segment_size * segment_count`` and steady-state recording creates no
+    files. How many hours that covers depends on the stream's bitrate; use a
+    frame filter (max_fps, FrameChangeDetector) to stretch it.
+
+    Each segment keeps a compact in-memory index of timestamps and offsets,
+    so seeking to a point in time is a binary search over segments and then
+    over frames, and clips are extracted by copying only the frames asked for.
+
+    An instance can be used directly as an ``img_callback`` or as a
+    CameraBroadcaster subscriber callback.
+    """
+    def __init__(self, directory, segment_size=64 * 1024 * 1024, segment_count=16,
+                 clock=time.time):
+        """Initialize recorder, reopening any segments already in directory.
+
+        Args:
+            directory: Directory holding the segment files
+            segment_size: Size of each segment file in bytes
+            segment_count: Number of segment files in the ring
+            clock: Function returning the timestamp for recorded frames
+        """
+        if segment_count < 2:
+            raise ValueError("segment_count must be at least 2")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.clock = clock
+        self.frames_written = 0
+        self.frames_skipped = 0
+        self._lock = threading.Lock()
+        # Each segment's disk space is reserved here, so a disk too small for
+        # the ring raises OSError now rather than failing mid-recording
+        self._segments = []
+        try:
+            for i in range(segment_count):
+                self._segments.append(
+                    _Segment(os.path.join(directory, f"segment-{i:04d}.bin"), segment_size))
+        except BaseException:
+            for segment in self._segments:
+                segment.close()
+            raise
+        for segment in self._segments:
+            segment.scan()
+
+        # Oldest segment first; the last one is being written
+        self._order = sorted(
+            range(segment_count),
+            key=lambda i: (self._segments[i].count > 0, self._segments[i].first_time or 0),
+        )
+
+    def __call__(self, frame):
+        self.write(frame)
+
+    def write(self, frame, timestamp=None):
+        """Append a frame to the ring.
+
+        Args:
+            frame: JPEG image data (bytes or memoryview)
+            timestamp: Frame time; defaults to ``clock()``
+
+        Returns:
+            True if the frame was stored, False if it does not fit in a segment
+        """
+        needed = _RECORD_HEADER.size + len(frame)
+        if needed + _RECORD_HEADER.size > self.segment_size:
+            self.frames_skipped += 1
+            return False
+        if timestamp is None:
+            timestamp = self.clock()
+
+        with self._lock:
+            segment = self._segments[self._order[-1]]
+            if segment.write_pos + needed + _RECORD_HEADER.size > self.segment_size:
+                segment = self.__recycle__()
+            last_time = segment.last_time
+            if last_time is not None and timestamp < last_time:
+                timestamp = last_time  # keep the index sorted if the clock steps back
+
+            pos = segment.write_pos
+            mm = segment.mmap
+            mm[pos + needed:pos + needed + _RECORD_HEADER.size] = _TERMINATOR
+            mm[pos + _RECORD_HEADER.size:pos + needed] = frame
+            _RECORD_HEADER.pack_into(mm, pos, RECORD_MAGIC, timestamp, len(frame))
+            segment.add(timestamp, pos)
+            segment.write_pos = pos + needed
+            self.frames_written += 1
+        return True
+
+    def __recycle__(self):
+        oldest = self._order.pop(0)
+        self._order.append(oldest)
+        segment = self._segments[oldest]
+        segment.clear()
+        return segment
+
+    @property
+    def start_time(self):
+        """Timestamp of the oldest recorded frame, or None."""
+        for i in self._order:
+            if self._segments[i].count:
+                return self._segments[i].first_time
+        return None
+
+    @property
+    def end_time(self):
+        """Timestamp of the newest recorded frame, or None."""
+        for i in reversed(self._order):
+            if self._segments[i].count:
+                return self._segments[i].last_time
+        return None
+
+    def seek(self, timestamp):
+        """Locate the first frame recorded at or after timestamp.
+
+        Returns:
+            (position in segment order, frame index) or None if no such frame
+        """
+        ordinals = [o for o, i in enumerate(self._order) if self._segments[i].count]
+        firsts = [self._segments[self._order[o]].first_time for o in ordinals]
+        start = max(bisect.bisect_right(firsts, timestamp) - 1, 0)
+        for ordinal in ordinals[start:]:
+            segment = self._segments[self._order[ordinal]]
+            index = bisect.bisect_left(segment.timestamps, timestamp, 0, segment.count)
+            if index < segment.count:
+                return ordinal, index
+        return None
+
+    def frames(self, start=None, end=None):
+        """Iterate over recorded frames in a time range.
+
+        Args:
+            start: First timestamp to include, or None for the oldest frame
+            end: Last timestamp to include, or None for the newest frame
+
+        Yields:
+            (timestamp, JPEG bytes) tuples in recording order
+        """
+        with self._lock:
+            position = self.seek(float("-inf") if start is None else start)
+            order = list(self._order)
+            generations = [self._segments[i].generation for i in order]
+        if position is None:
+            return
+        ordinal, index = position
+
+        while ordinal < len(order):
+            with self._lock:
+                segment = self._segments[order[ordinal]]
+                # Skip segments recycled since the iteration started
+                if index >= segment.count or segment.generation != generations[ordinal]:
+                    frame = None
+                else:
+                    timestamp = segment.timestamps[index]
+                    offset = segment.offsets[index]
+                    _, _, length = _RECORD_HEADER.unpack_from(segment.mmap, offset)
+                    begin = offset + _RECORD_HEADER.size
+                    frame = segment.mmap[begin:begin + length]
+            if frame is None:
+                ordinal += 1
+                index = 0
+                continue
+            if end is not None and timestamp > end:
+                return
+            yield timestamp, frame
+            index += 1
+
+    def export_clip(self, path, start=None, end=None):
+        """Write the frames of a time range to path as a raw MJPEG stream.
+
+        The file is a plain concatenation of JPEG frames, which tools such as
+        ffmpeg read with ``-f mjpeg``.
+
+        Returns:
+            Number of frames written
+        """
+        count = 0
+        with open(path, "wb") as f:
+            for _, frame in self.frames(start, end):
+                f.write(frame)
+                count += 1
+        return count
+
+    def flush(self):
+        """Flush written frames to disk."""
+        with self._lock:
+            for segment in self._segments:
+                segment.mmap.flush()
+
+    def close(self):
+        """Flush and close all segment files."""
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
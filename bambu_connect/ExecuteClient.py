@@ -1,30 +1,420 @@
+from concurrent.futures import CancelledError, Future
+from dataclasses import dataclass
+import heapq
+import itertools
 import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+import paho.mqtt.client as mqtt
+from .utils.models import CommandResponse, ModuleVersion
+from .utils.ratelimit import TokenBucket
+
+# Commands the printer answers under a different command name
+RESPONSE_COMMANDS = {"pushall": "push_status"}
+
+# Command priorities; lower values are sent first
+URGENT = 0
+NORMAL = 1
+BULK = 2
+
+PRIORITIES = (URGENT, NORMAL, BULK)
+
+# Priority by command name; others are NORMAL
+COMMAND_PRIORITIES = {"stop": URGENT, "pause": URGENT, "gcode_line": BULK}
+
+# URGENT commands that cancel everything still queued, so no buffered
+# motion or heater G-code reaches the printer after them
+FLUSHING_COMMANDS = {"stop", "pause"}
+
+
+def _coalesce_key(section, body):
+    """Key of the setting a queued command overwrites, or None if it must always be sent."""
+    command = body.get("command")
+    if command == "print_speed":
+        return section, command
+    if command == "ledctrl":
+        return section, command, body.get("led_node")
+    return None
+
+
+def _chain(source: Future, target: Future):
+    """Complete target like source."""
+    if target.cancelled():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+@dataclass
+class GcodeBatchStats:
+    """Progress of a send_gcode_batch call."""
+    lines: int = 0  # Lines acknowledged by the printer
+    batches: int = 0  # Batches acknowledged by the printer
+    bytes: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None  # Why sending stopped early
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.elapsed if self.elapsed else 0.0
+
+
+def _gcode_lines(gcode: Union[str, "os.PathLike", Iterable[str]]) -> Iterator[str]:
+    """Yield G-code lines without comments or blank lines, reading files lazily.
+
+    A str or path-like object is always a file path, so a missing file
+    raises FileNotFoundError instead of being sent as G-code.
+    """
+    if isinstance(gcode, (str, os.PathLike)):
+        with open(gcode) as f:
+            yield from _gcode_lines(f)
+        return
+    for line in gcode:
+        line = line.split(";", 1)[0].strip()
+        if line:
+            yield line
+
+
+def _gcode_batches(lines: Iterable[str], max_bytes: int) -> Iterator[Tuple[str, int]]:
+    """Pack lines into "\n"-terminated payloads of up to max_bytes.
+
+    A line longer than max_bytes is sent on its own.
+    """
+    batch, size = [], 0
+    for line in lines:
+        length = len(line) + 1
+        if batch and size + length > max_bytes:
+            yield "\n".join(batch) + "\n", len(batch)
+            batch, size = [], 0
+        batch.append(line)
+        size += length
+    if batch:
+        yield "\n".join(batch) + "\n", len(batch)
+
 
 class ExecuteClient:
     """Client for sending commands to Bambu printer."""
     
-    def __init__(self, hostname: str, access_code: str, serial: str, mqtt_client=None):
+    def __init__(self, hostname: str, access_code: str, serial: str, mqtt_client=None,
+                 timeout: float = 10, rate_limit: Optional[float] = None, burst: int = 5):
+        """Initialize execute client.
+        
+        Args:
+            hostname: Printer's IP address or hostname
+            access_code: Printer's access code
+            serial: Printer's serial number
+            mqtt_client: Optional shared MQTT client instance
+            timeout: Default seconds to wait for a command's response
+            rate_limit: Maximum commands per second, or None to publish every
+                command at once. When set, commands wait in a priority queue
+                and a waiting print speed or light command is replaced by a
+                newer one for the same setting.
+            burst: Commands that may be sent back to back under rate_limit
+        """
         self.hostname = hostname
         self.access_code = access_code
         self.serial = serial
         self.client = mqtt_client
+        self.timeout = timeout
+        self._sequence = itertools.count(1)
+        self._pending = {}  # sequence_id -> (response command, Future)
+        self._deadlines = []  # heap of (deadline, sequence_id)
+        self._lock = threading.Lock()
+        self._timer = None
+        self._timer_deadline = None
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self._queue = []  # heap of (priority, order, [section, body, timeout, futures, key])
+        self._queued = {}  # coalesce key -> queue entry
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._worker = None
+        self._running = True
+        # Held while publishing a queued command and while flushing the queue
+        # for a stop, so a command taken just before a stop cannot follow it
+        self._send_lock = threading.RLock()
+        self._flushes = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.peak_queue_depth = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of commands still waiting for a response."""
+        return len(self._pending)
 
-    def send_command(self, payload):
-        """Send command payload to printer."""
+    @property
+    def queue_depth(self) -> int:
+        """Number of commands waiting for the rate limit."""
+        return len(self._queue)
+
+    @property
+    def queue_depths(self) -> Dict[int, int]:
+        """Number of commands waiting for the rate limit, by priority."""
+        with self._condition:
+            depths = dict.fromkeys(PRIORITIES, 0)
+            for priority, _, _ in self._queue:
+                depths[priority] += 1
+        return depths
+
+    def send_command(self, payload: Union[str, Dict[str, Any]],
+                     timeout: Optional[float] = None,
+                     priority: Optional[int] = None) -> Future:
+        """Send command payload to printer.
+        
+        The command always gets a fresh sequence id, replacing any the payload
+        sets, and the printer echoes it in its response on the report topic.
+        
+        Args:
+            payload: Command dict (or its JSON) such as {"print": {"command": "pause"}}
+            timeout: Seconds to wait for the response once sent, default
+                ``self.timeout``
+            priority: URGENT, NORMAL or BULK; by default stop and pause are
+                URGENT, G-code is BULK and everything else NORMAL. URGENT
+                commands skip the queue and the rate limit, and an URGENT
+                stop or pause cancels every command still queued.
+            
+        Returns:
+            Future resolving to the printer's CommandResponse. It fails with
+            TimeoutError when no response arrives in time, and with
+            ConnectionError when the command could not be sent. It is
+            cancelled if the client is closed, or a stop or pause is sent,
+            before the command is sent.
+        """
         if not self.client:
             raise RuntimeError("No MQTT client available")
             
-        if isinstance(payload, dict):
-            payload = json.dumps(payload)
-            
-        self.client.publish(f"device/{self.serial}/request", payload)
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        if not isinstance(payload, dict) or len(payload) != 1:
+            raise ValueError("Command payload must have exactly one section")
+        (section, body), = payload.items()
+        if priority is None:
+            priority = COMMAND_PRIORITIES.get(body.get("command"), NORMAL)
+        elif priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}, expected one of {PRIORITIES}")
+
+        future = Future()
+        if priority == URGENT and body.get("command") in FLUSHING_COMMANDS:
+            with self._send_lock:
+                flushed = self.__flush__()
+                self.__publish__(section, body, timeout, [future])
+            for entry in flushed:
+                for queued in entry[3]:
+                    queued.cancel()
+            return future
+        if self.bucket is None or priority == URGENT:
+            self.__publish__(section, body, timeout, [future])
+            return future
+
+        key = _coalesce_key(section, body)
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("ExecuteClient is closed")
+            entry = self._queued.get(key) if key else None
+            if entry is not None:
+                # Send the newest value in the superseded command's place
+                entry[1], entry[2] = body, timeout
+                entry[3].append(future)
+                self.coalesced += 1
+                return future
+            entry = [section, body, timeout, [future], key]
+            heapq.heappush(self._queue, (priority, next(self._order), entry))
+            if key:
+                self._queued[key] = entry
+            self.peak_queue_depth = max(self.peak_queue_depth, len(self._queue))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self.__run__, daemon=True,
+                                                name=f"ExecuteClient-{self.serial}")
+                self._worker.start()
+            self._condition.notify()
+        return future
+
+    def __run__(self):
+        """Send queued commands in priority order as the rate limit allows."""
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                delay = self.bucket.delay()
+                if delay > 0:
+                    # Look at the queue again afterwards: a more urgent
+                    # command may have arrived meanwhile
+                    self._condition.wait(delay)
+                    continue
+                self.bucket.take()
+                _, _, entry = heapq.heappop(self._queue)
+                if entry[4]:
+                    del self._queued[entry[4]]
+                flushes = self._flushes
+            with self._send_lock:
+                # A stop or pause flushed the queue after this was taken
+                flushed = flushes != self._flushes
+                if not flushed:
+                    try:
+                        self.__publish__(*entry[:4])
+                    except Exception as e:
+                        for future in entry[3]:
+                            if not future.cancelled():
+                                future.set_exception(e)
+            if flushed:
+                for future in entry[3]:
+                    future.cancel()
+
+    def __flush__(self):
+        """Empty the queue for a stop or pause, returning the dropped entries."""
+        with self._condition:
+            self._flushes += 1
+            flushed = [entry for _, _, entry in self._queue]
+            self._queue.clear()
+            self._queued.clear()
+        return flushed
+
+    def __publish__(self, section, body, timeout, futures):
+        """Publish a command and track its response for futures."""
+        # Never reuse the caller's id: two pending commands with one id would
+        # share a _pending entry and one of them would never resolve
+        sequence_id = str(next(self._sequence))
+        payload = {section: dict(body, sequence_id=sequence_id)}
+        command = body.get("command")
+
+        if len(futures) == 1:
+            future = futures[0]
+        else:
+            # Coalesced commands all complete with the one response
+            future = Future()
+            for target in futures:
+                future.add_done_callback(lambda source, target=target: _chain(source, target))
+
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        # Register before publishing: the response can arrive on the network
+        # thread before publish() returns
+        with self._lock:
+            expired = self.__expire__(time.monotonic())
+            self._pending[sequence_id] = (RESPONSE_COMMANDS.get(command, command), future)
+            heapq.heappush(self._deadlines, (deadline, sequence_id))
+            self.__arm_timer__()
+        self.__fail__(expired)
+
+        info = self.client.publish(f"device/{self.serial}/request", json.dumps(payload))
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            with self._lock:
+                self._pending.pop(sequence_id, None)
+            future.set_exception(ConnectionError(
+                f"Failed to send {command}: {mqtt.error_string(info.rc)}"))
+        else:
+            with self._lock:
+                self.sent += 1
+
+    def close(self):
+        """Stop the send queue, cancelling commands that were not sent yet."""
+        with self._condition:
+            self._running = False
+            queued = [entry for _, _, entry in self._queue]
+            self._queue.clear()
+            self._queued.clear()
+            self._condition.notify_all()
+        for entry in queued:
+            for future in entry[3]:
+                future.cancel()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def handle_report(self, doc: Dict[str, Any]):
+        """Resolve the futures of commands answered in a report message.
+        
+        Args:
+            doc: Decoded message from the report topic
+        """
+        now = time.monotonic()
+        for body in doc.values():
+            if type(body) is not dict:
+                continue
+            sequence_id = body.get("sequence_id")
+            if sequence_id is None:
+                continue
+            with self._lock:
+                entry = self._pending.get(str(sequence_id))
+                # The printer numbers its own pushes too; only a reply to the
+                # same command is a response
+                if entry is None or entry[0] != body.get("command"):
+                    continue
+                del self._pending[str(sequence_id)]
+            if not entry[1].cancelled():
+                entry[1].set_result(CommandResponse.from_report(body))
+        if self._deadlines and self._deadlines[0][0] <= now:
+            with self._lock:
+                expired = self.__expire__(now)
+            self.__fail__(expired)
+
+    def __arm_timer__(self):
+        """Wake up at the earliest deadline, so commands time out without traffic.
+
+        Call with the lock held. With a constant timeout deadlines only grow,
+        so one timer is started per expiry rather than per command.
+        """
+        if not self._deadlines:
+            return
+        deadline = self._deadlines[0][0]
+        if self._timer is not None and self._timer_deadline <= deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(max(0.0, deadline - time.monotonic()), self.__on_timer__)
+        self._timer.daemon = True
+        self._timer_deadline = deadline
+        self._timer.start()
+
+    def __on_timer__(self):
+        with self._lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+            expired = self.__expire__(time.monotonic())
+            self.__arm_timer__()
+        self.__fail__(expired)
+
+    def __expire__(self, now):
+        """Remove commands whose response deadline has passed; call with the lock held."""
+        expired = []
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, sequence_id = heapq.heappop(deadlines)
+            entry = self._pending.pop(sequence_id, None)
+            if entry is not None:
+                expired.append((sequence_id, entry))
+        if not self._pending:
+            deadlines.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return expired
+
+    @staticmethod
+    def __fail__(expired):
+        """Fail timed out futures; outside the lock, as done callbacks run here."""
+        for sequence_id, (command, future) in expired:
+            if not future.cancelled():
+                future.set_exception(TimeoutError(
+                    f"No response to {command} (sequence id {sequence_id})"))
 
     # Light Control
     def set_chamber_light(self, on: bool):
         """Control the chamber light."""
         command = {
             "system": {
-                "sequence_id": "0",
                 "command": "ledctrl",
                 "led_node": "chamber_light",
                 "led_mode": "on" if on else "off",
@@ -34,45 +424,128 @@ class ExecuteClient:
                 "interval_time": 0
             }
         }
-        self.send_command(command)
+        return self.send_command(command)
 
     # Print Control Commands
     def set_print_speed(self, speed_profile: str):
         """Set the print speed profile."""
         command = {
             "print": {
-                "sequence_id": "0",
                 "command": "print_speed",
                 "param": speed_profile
             }
         }
-        self.send_command(command)
+        return self.send_command(command)
 
     def pause_print(self):
         """Pause the current print."""
-        command = {"print": {"sequence_id": "0", "command": "pause"}}
-        self.send_command(command)
+        command = {"print": {"command": "pause"}}
+        return self.send_command(command)
 
     def resume_print(self):
         """Resume the paused print."""
-        command = {"print": {"sequence_id": "0", "command": "resume"}}
-        self.send_command(command)
+        command = {"print": {"command": "resume"}}
+        return self.send_command(command)
 
     def stop_print(self):
         """Stop the current print."""
-        command = {"print": {"sequence_id": "0", "command": "stop"}}
-        self.send_command(command)
+        command = {"print": {"command": "stop"}}
+        return self.send_command(command)
 
     def send_gcode(self, gcode: str):
         """Send G-code command to printer."""
         command = {
             "print": {
-                "sequence_id": "0",
                 "command": "gcode_line",
                 "param": f"{gcode}\n"
             }
         }
-        self.send_command(command)
+        return self.send_command(command)
+
+    def send_gcode_batch(self, gcode: Union[str, "os.PathLike", Iterable[str]],
+                         max_bytes: int = 1024, window: int = 4,
+                         on_progress: Optional[Callable[[GcodeBatchStats], None]] = None
+                         ) -> GcodeBatchStats:
+        """Send many G-code lines, packed into few gcode_line commands.
+        
+        Lines are read lazily, comments and blank lines are dropped, and at
+        most ``window`` batches wait for the printer's acknowledgement at a
+        time, so long macros neither publish per line nor flood the
+        printer's queue. A stop or pause ends the batch: queued batches are
+        cancelled and no more are sent. Blocks until every batch is
+        acknowledged; do not call it from an MQTT callback, which would
+        block the acknowledgements.
+        
+        Args:
+            gcode: Path of a G-code file (a str or os.PathLike), or an
+                iterable of lines (a list, generator or open file). A
+                missing file raises FileNotFoundError before anything is
+                sent; pass G-code text as ``text.splitlines()``.
+            max_bytes: Maximum size of each batch's G-code
+            window: Maximum batches sent but not yet acknowledged
+            on_progress: Function called with the GcodeBatchStats after
+                each acknowledged batch
+                
+        Returns:
+            GcodeBatchStats; ``error`` is set if a batch failed or timed out,
+            in which case the remaining lines were not sent
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+        if window < 1:
+            raise ValueError("window must be at least 1")
+
+        stats = GcodeBatchStats()
+        flushes = self._flushes
+        slots = threading.Semaphore(window)
+        lock = threading.Lock()
+        start = time.monotonic()
+
+        def acknowledged(future, lines, size):
+            try:
+                response = future.result()
+                error = None if response.ok else f"rejected: {response.reason or response.result}"
+            except CancelledError:
+                error = "cancelled"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            with lock:
+                if error is None:
+                    stats.lines += lines
+                    stats.batches += 1
+                    stats.bytes += size
+                elif stats.error is None:
+                    stats.error = error
+                stats.elapsed = time.monotonic() - start
+            slots.release()
+            if error is None and on_progress:
+                try:
+                    on_progress(stats)
+                except Exception as e:
+                    print(f"Warning: Error in G-code progress callback: {e}")
+
+        for payload, lines in _gcode_batches(_gcode_lines(gcode), max_bytes):
+            slots.acquire()
+            command = {"print": {"command": "gcode_line", "param": payload}}
+            # Checked under the queue's lock, so a batch cannot be queued
+            # behind a stop that flushed the earlier ones
+            with self._condition:
+                if flushes != self._flushes:
+                    with lock:
+                        stats.error = stats.error or "interrupted by stop or pause"
+                if stats.error is None:
+                    future = self.send_command(command)
+            if stats.error is not None:
+                slots.release()
+                break
+            future.add_done_callback(
+                lambda future, lines=lines, size=len(payload): acknowledged(future, lines, size))
+
+        # Wait for the batches still in flight
+        for _ in range(window):
+            slots.acquire()
+        stats.elapsed = time.monotonic() - start
+        return stats
 
     def start_print(self, file: str, use_ams: bool = False, enable_timelapse: bool = False):
         """Start printing specified file.
@@ -84,7 +557,6 @@ class ExecuteClient:
         """
         command = {
             "print": {
-                "sequence_id": "0",
                 "command": "project_file",
                 "param": "Metadata/plate_1.gcode",
                 "url": f"ftp://{file}",
@@ -103,7 +575,7 @@ class ExecuteClient:
                 "task_id": "0",
             }
         }
-        self.send_command(command)
+        return self.send_command(command)
 
     def skip_objects(self, object_list: list):
         """Skip specified objects in current print.
@@ -113,24 +585,40 @@ class ExecuteClient:
         """
         command = {
             "print": {
-                "sequence_id": "0",
                 "command": "skip_objects",
                 "obj_list": object_list
             }
         }
-        self.send_command(command)
+        return self.send_command(command)
 
-    def get_version(self):
-        """Request printer version information."""
-        command = {"info": {"sequence_id": "0", "command": "get_version"}}
-        self.send_command(command)
+    def get_version(self) -> Future:
+        """Request printer version information.
+        
+        Returns:
+            Future resolving to a dict of ModuleVersion keyed by module name
+            (e.g. "ota", "mc", "ams/0")
+        """
+        command = {"info": {"command": "get_version"}}
+        versions = Future()
+        
+        def parse(response):
+            try:
+                modules = response.result().extra_fields.get("module") or []
+                versions.set_result({
+                    module.get("name"): ModuleVersion.from_report(module) for module in modules
+                })
+            except Exception as e:
+                versions.set_exception(e)
+        
+        self.send_command(command).add_done_callback(parse)
+        return versions
 
     def dump_info(self):
         """Request full printer status dump."""
-        command = {"pushing": {"sequence_id": "0", "command": "pushall"}}
-        self.send_command(command)
+        command = {"pushing": {"command": "pushall"}}
+        return self.send_command(command)
 
     def start_monitoring(self):
         """Start continuous status monitoring."""
-        command = {"pushing": {"sequence_id": "0", "command": "start"}}
-        self.send_command(command)
\ No newline at end of file
+        command = {"pushing": {"command": "start"}}
+        return self.send_command(command)
\ No newline at end of file
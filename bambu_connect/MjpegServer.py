@@ -0,0 +1,161 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .CameraBroadcaster import CameraBroadcaster, DROP_OLDEST
+
+
+class MjpegServer:
+    """HTTP server re-streaming printer cameras as ``multipart/x-mixed-replace``.
+
+    Each printer gets one upstream camera connection, shared by all viewers
+    through a CameraBroadcaster. Every viewer holds a single-frame queue that
+    drops the oldest frame, so a slow browser simply skips frames instead of
+    buffering them.
+
+    Routes:
+        /<name>/stream    MJPEG stream of the named camera
+        /<name>/snapshot  Latest JPEG frame of the named camera
+        /stream, /snapshot  Same, for the first camera
+        /                 Index page listing the cameras
+    """
+    def __init__(self, cameras, host="0.0.0.0", port=8080, frame_timeout=10.0,
+                 stall_timeout=10.0, max_snapshot_age=10.0):
+        """Initialize MJPEG server.
+
+        Args:
+            cameras: CameraClient, or dict mapping a URL-safe name to a CameraClient
+            host: Interface to listen on
+            port: TCP port to listen on (0 picks a free port)
+            frame_timeout: Seconds a viewer waits for a frame before the
+                response is closed
+            stall_timeout: Seconds without data before an upstream camera
+                connection is dropped and reconnected
+            max_snapshot_age: Seconds after which /snapshot answers 503
+                instead of serving the last frame, or None to serve any age
+        """
+        if not isinstance(cameras, dict):
+            cameras = {"camera": cameras}
+        if not cameras:
+            raise ValueError("At least one camera is required")
+
+        self.broadcasters = {
+            name: CameraBroadcaster(client) for name, client in cameras.items()
+        }
+        self.default_camera = next(iter(self.broadcasters))
+        self.frame_timeout = frame_timeout
+        self.stall_timeout = stall_timeout
+        self.max_snapshot_age = max_snapshot_age
+        self.httpd = ThreadingHTTPServer((host, port), self.__make_handler__())
+        self.httpd.daemon_threads = True
+        self.server_thread = None
+
+    @property
+    def port(self):
+        """Port the server is listening on."""
+        return self.httpd.server_address[1]
+
+    def start(self):
+        """Start the upstream camera streams and serve HTTP in a background thread.
+
+        The upstream streams reconnect with backoff after a printer reboot
+        or network drop.
+        """
+        for broadcaster in self.broadcasters.values():
+            broadcaster.start(reconnect=True, stall_timeout=self.stall_timeout)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.server_thread.start()
+
+    def stop(self):
+        """Stop serving, disconnect viewers and close the camera streams."""
+        self.httpd.shutdown()
+        for broadcaster in self.broadcasters.values():
+            broadcaster.stop()
+        self.httpd.server_close()
+        if self.server_thread:
+            self.server_thread.join()
+
+    def __make_handler__(self):
+        server = self
+
+        class Handler(_MjpegRequestHandler):
+            mjpeg_server = server
+
+        return Handler
+
+
+class _MjpegRequestHandler(BaseHTTPRequestHandler):
+    mjpeg_server = None
+    boundary = "frame"
+
+    def do_GET(self):
+        parts = [part for part in self.path.split("?", 1)[0].split("/") if part]
+        if not parts:
+            return self.__send_index__()
+        if len(parts) == 1:
+            name, action = self.mjpeg_server.default_camera, parts[0]
+        elif len(parts) == 2:
+            name, action = parts
+        else:
+            return self.send_error(404)
+
+        broadcaster = self.mjpeg_server.broadcasters.get(name)
+        if broadcaster is None:
+            return self.send_error(404, f"Unknown camera {name}")
+        if action == "stream":
+            return self.__send_stream__(broadcaster)
+        if action == "snapshot":
+            return self.__send_snapshot__(broadcaster)
+        self.send_error(404)
+
+    def __send_index__(self):
+        links = "".join(
+            f'<li>{name}: <a href="/{name}/stream">stream</a> '
+            f'<a href="/{name}/snapshot">snapshot</a></li>'
+            for name in self.mjpeg_server.broadcasters
+        )
+        body = f"<html><body><ul>{links}</ul></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __send_snapshot__(self, broadcaster):
+        frame = broadcaster.latest_frame
+        if frame is None:
+            return self.send_error(503, "No frame received yet")
+        max_age = self.mjpeg_server.max_snapshot_age
+        if max_age is not None and broadcaster.latest_frame_age > max_age:
+            return self.send_error(503, "Camera frame is stale")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(frame)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(frame)
+
+    def __send_stream__(self, broadcaster):
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={self.boundary}")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        with broadcaster.subscribe(maxsize=1, policy=DROP_OLDEST) as subscription:
+            try:
+                while True:
+                    frame = subscription.get(timeout=self.mjpeg_server.frame_timeout)
+                    if frame is None:
+                        break
+                    self.wfile.write(
+                        f"--{self.boundary}\r\n"
+                        f"Content-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(frame)}\r\n\r\n".encode()
+                    )
+                    self.wfile.write(frame)
+                    self.wfile.write(b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
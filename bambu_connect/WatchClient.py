@@ -1,9 +1,14 @@
 from .utils.models import PrinterStatus
 import json
+import threading
 import requests
-from typing import Optional, Callable
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+from .utils.dispatch import INLINE, POOL, StatusDispatcher, StatusThrottle, shared_pool
 from .utils.error_codes import PRINT_ERROR_ERRORS, HMS_ERRORS
 
+# Report keys whose changes bypass max_rate throttling
+CRITICAL_FIELDS = ("gcode_state", "print_error")
+
 class WatchClient:
     """Client for monitoring printer status."""
     
@@ -24,46 +29,264 @@ class WatchClient:
         self.printerStatus = None
         self.message_callback = None
         self.on_connect_callback = None
+        self.active = False
+        self._connect_callback_pending = False
+        self.incremental = False
+        self.lazy = False
+        # top-level report key -> ((field, path, token, callback), ...); replaced,
+        # never mutated, so readers on the MQTT or dispatcher thread need no lock
+        self._field_index = {}
+        self._field_lock = threading.Lock()
+        self.dispatcher = None
+        self._owns_dispatcher = False
+        self._pending_delta = {}
+        self._pending_lock = threading.Lock()
+        self._process_lock = threading.Lock()
+        self.throttle = None
+        self.critical_fields = ()
+        self._critical_values = {}
 
     def start(self, message_callback: Optional[Callable[[PrinterStatus], None]] = None,
-              on_connect_callback: Optional[Callable[[], None]] = None):
-        """Start monitoring printer status."""
+              on_connect_callback: Optional[Callable[[], None]] = None,
+              incremental: bool = False,
+              dispatcher: Union[str, StatusDispatcher] = INLINE,
+              max_rate: Optional[float] = None,
+              leading: bool = True,
+              trailing: bool = True,
+              critical_fields: Iterable[str] = CRITICAL_FIELDS,
+              lazy: bool = False):
+        """Start monitoring printer status.
+        
+        Args:
+            message_callback: Function called with each updated PrinterStatus
+            on_connect_callback: Function called once subscribed
+            incremental: Only parse the keys present in each report and reuse
+                the unchanged parts of the previous PrinterStatus
+            dispatcher: Where status models are built and callbacks run:
+                "inline" (on the MQTT network thread), "thread" (a worker
+                thread for this printer), "pool" (a thread pool shared by all
+                printers using "pool"), or a StatusDispatcher. Reports that
+                arrive while one is being processed are merged, so a slow
+                callback sees the newest state instead of a growing backlog.
+            max_rate: Maximum status deliveries per second, or None for every
+                report. Reports in between are merged and no PrinterStatus
+                is built for them.
+            leading: Deliver the first report after a quiet period at once
+            trailing: Deliver reports held back by max_rate when the interval ends
+            critical_fields: Report keys whose changes are delivered at once,
+                bypassing max_rate
+            lazy: Keep nested sections (ams, vt_tray, upgrade_state, ...) as
+                raw report data until they are first accessed on a status
+        """
         if not self.client:
             raise RuntimeError("No MQTT client available")
             
         self.message_callback = message_callback
         self.on_connect_callback = on_connect_callback
+        self.incremental = incremental
+        self.lazy = lazy
+        if dispatcher == POOL:
+            self.dispatcher = shared_pool()
+            self._owns_dispatcher = False
+        elif isinstance(dispatcher, str):
+            self.dispatcher = StatusDispatcher(dispatcher)
+            self._owns_dispatcher = True
+        else:
+            self.dispatcher = dispatcher
+            self._owns_dispatcher = False
+        self.critical_fields = tuple(critical_fields)
+        self._critical_values = {}
+        self.throttle = (StatusThrottle(max_rate, self.__deliver__, leading, trailing)
+                         if max_rate else None)
         
         # Subscribe to printer status topic
+        self.active = True
         self.client.subscribe(f"device/{self.serial}/report")
-        self.client.on_message = self.on_message
+        if getattr(self.client, "on_message", None) is None:
+            # A BambuClient routes report messages to handle_report itself
+            self.client.on_message = self.on_message
         
-        if self.on_connect_callback:
-            self.on_connect_callback()
+        if self.client.is_connected():
+            if self.on_connect_callback:
+                self.on_connect_callback()
+        else:
+            # Not connected yet: resubscribe() runs it once the connection is up
+            self._connect_callback_pending = True
 
-    def stop(self):
-        """Stop monitoring."""
-        if self.client:
+    def resubscribe(self):
+        """Subscribe again after the MQTT connection is (re)established."""
+        if not self.active:
+            return
+        self.client.subscribe(f"device/{self.serial}/report")
+        if self._connect_callback_pending:
+            self._connect_callback_pending = False
+            if self.on_connect_callback:
+                self.on_connect_callback()
+
+    def stop(self, unsubscribe: bool = True):
+        """Stop monitoring.
+        
+        Args:
+            unsubscribe: Unsubscribe from the report topic; False when others
+                still listen to it on the shared client
+        """
+        self.active = False
+        self._connect_callback_pending = False
+        if self.client and unsubscribe:
             self.client.unsubscribe(f"device/{self.serial}/report")
+        if self.throttle:
+            self.throttle.cancel()
+            self.throttle = None
+        if self.dispatcher and self._owns_dispatcher:
+            self.dispatcher.stop()
+        self.dispatcher = None
+
+
+    def on_change(self, fields: Iterable[str],
+                  callback: Callable[[Dict[str, Tuple[Any, Any]], PrinterStatus], None]
+                  ) -> Callable[[], None]:
+        """Call back only when specific report fields change.
+        
+        Fields are report keys, with dots for nested values and integers for
+        list positions, e.g. "gcode_state", "ams.tray_now" or
+        "ams.ams.0.humidity". Subscriptions are indexed by top-level key, so
+        a message only costs work for the keys it contains.
+        
+        Args:
+            fields: Field paths to watch
+            callback: Function called with a dict mapping each changed field
+                to its (old, new) value, and the updated PrinterStatus
+                
+        Returns:
+            Function that removes the subscription
+        """
+        if isinstance(fields, str):
+            fields = [fields]
+        token = object()
+        entries = []
+        for field in fields:
+            path = tuple(int(p) if p.isdigit() else p for p in field.split("."))
+            entries.append((path[0], (field, path[1:], token, callback)))
+
+        with self._field_lock:
+            index = dict(self._field_index)
+            for key, entry in entries:
+                index[key] = index.get(key, ()) + (entry,)
+            self._field_index = index
+
+        def unsubscribe():
+            with self._field_lock:
+                index = dict(self._field_index)
+                for key, entry in entries:
+                    subscribers = tuple(e for e in index.get(key, ()) if e is not entry)
+                    if subscribers:
+                        index[key] = subscribers
+                    else:
+                        index.pop(key, None)
+                self._field_index = index
+
+        return unsubscribe
 
+    def __notify_field_changes__(self, index, watched, delta):
+        """Call field subscribers whose values differ from before the delta."""
+        changes = {}
+        for key, old_value in watched.items():
+            new_value = delta[key]
+            for field, path, token, callback in index[key]:
+                old = _resolve(old_value, path)
+                new = _resolve(new_value, path)
+                if old != new:
+                    changes.setdefault((token, callback), {})[field] = (old, new)
+
+        for (_, callback), changed in changes.items():
+            try:
+                callback(changed, self.printerStatus)
+            except Exception as e:
+                print(f"Warning: Error in field change callback: {e}")
 
     def on_message(self, client, userdata, msg):
         """Process incoming printer status messages."""
         try:
-            doc = json.loads(msg.payload)
+            self.handle_report(json.loads(msg.payload))
+        except json.JSONDecodeError:
+            print("Warning: Failed to decode message payload")
+
+    def handle_report(self, doc: Dict[str, Any]):
+        """Process a decoded report message."""
+        try:
             if not doc:
                 return
 
-            self.values.update(doc.get("print", doc))  # Merge the print data if it exists
+            delta = doc.get("print", doc)
 
-            # Create PrinterStatus instance (this automatically populates error_description)
-            self.printerStatus = PrinterStatus(**self.values)
+            # Merge into the not-yet-processed delta; throttled and conflated
+            # reports are processed together as one merged delta
+            with self._pending_lock:
+                self._pending_delta.update(delta)
 
-            # Pass the updated PrinterStatus object to message_callback
-            if self.message_callback:
-                self.message_callback(self.printerStatus)
+            if self.throttle:
+                self.throttle.offer(force=self.__is_critical__(delta))
+            else:
+                self.__deliver__()
 
-        except json.JSONDecodeError:
-            print("Warning: Failed to decode message payload")
         except Exception as e:
             print(f"Warning: Error processing message: {e}")
+
+    def __is_critical__(self, delta):
+        """Check whether a report changes one of the critical fields."""
+        critical = False
+        for key in self.critical_fields:
+            if key in delta:
+                value = delta[key]
+                if self._critical_values.get(key, value) != value:
+                    critical = True
+                self._critical_values[key] = value
+        return critical
+
+    def __deliver__(self):
+        """Process the pending delta inline or hand it to the dispatcher."""
+        if self.dispatcher is None or self.dispatcher.mode == INLINE:
+            self.__process_pending__()
+        else:
+            self.dispatcher.submit(self.serial, self.__process_pending__)
+
+    def __process_pending__(self):
+        with self._process_lock:
+            with self._pending_lock:
+                delta, self._pending_delta = self._pending_delta, {}
+            if delta:
+                try:
+                    self.__process_delta__(delta)
+                except Exception as e:
+                    print(f"Warning: Error processing message: {e}")
+
+    def __process_delta__(self, delta):
+        """Merge a report delta, rebuild the status and run the callbacks."""
+        # Remember the previous values of keys that have field subscribers
+        index = self._field_index
+        watched = {key: self.values.get(key) for key in delta if key in index}
+
+        self.values.update(delta)  # Merge the print data if it exists
+
+        # Create PrinterStatus instance (this automatically populates error_description)
+        if self.incremental and self.printerStatus is not None:
+            self.printerStatus = self.printerStatus.apply_delta(delta, self.lazy)
+        else:
+            self.printerStatus = PrinterStatus.from_report(self.values, self.lazy)
+
+        if watched:
+            self.__notify_field_changes__(index, watched, delta)
+
+        # Pass the updated PrinterStatus object to message_callback
+        if self.message_callback:
+            self.message_callback(self.printerStatus)
+
+
+def _resolve(value, path):
+    """Follow a field path through nested report dicts and lists."""
+    for part in path:
+        try:
+            value = value[part]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value
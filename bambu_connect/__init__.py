@@ -1,2 +1,2 @@
-from .BambuClient import BambuClient
+from .BambuClient import BambuClient, connect_all
 from .utils.models import *
\ No newline at end of file
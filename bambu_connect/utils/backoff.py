@@ -0,0 +1,36 @@
+import random
+
+
+class Backoff:
+    """Exponential backoff with random jitter.
+
+    Each delay is drawn from ``[base * (1 - jitter), base]`` where ``base``
+    doubles (by ``multiplier``) after every attempt up to ``maximum``, so many
+    clients retrying at once spread out instead of arriving in lockstep.
+    """
+    def __init__(self, initial=1.0, maximum=60.0, multiplier=2.0, jitter=0.5):
+        """Initialize backoff.
+
+        Args:
+            initial: Base delay in seconds for the first retry
+            maximum: Upper bound for the base delay
+            multiplier: Growth factor applied after each attempt
+            jitter: Fraction of the base delay that is randomised (0 to 1)
+        """
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.attempts = 0
+
+    def next(self):
+        """Return the delay before the next attempt and advance the schedule."""
+        base = min(self.maximum, self.initial * self.multiplier ** self.attempts)
+        self.attempts += 1
+        return base * (1 - self.jitter * random.random())
+
+    def reset(self):
+        """Start over from the initial delay, e.g. after a successful attempt."""
+        self.attempts = 0
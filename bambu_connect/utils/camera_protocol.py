@@ -0,0 +1,203 @@
+import ssl
+import struct
+
+
+HEADER_SIZE = 16
+JPEG_START = b"\xff\xd8\xff\xe0"
+JPEG_END = b"\xff\xd9"
+
+_HEADER = struct.Struct("<IIII")
+
+
+def create_auth_packet(username, access_code):
+    """Create authentication packet for camera stream access.
+
+    Args:
+        username: Client username
+        access_code: Printer access code
+
+    Returns:
+        Formatted authentication packet as bytearray
+    """
+    auth_data = bytearray()
+    auth_data += struct.pack("<I", 0x40)  # '@'\0\0\0
+    auth_data += struct.pack("<I", 0x3000)  # \0'0'\0\0
+    auth_data += struct.pack("<I", 0)  # \0\0\0\0
+    auth_data += struct.pack("<I", 0)  # \0\0\0\0
+    auth_data += username.encode("ascii").ljust(32, b"\0")
+    auth_data += access_code.encode("ascii").ljust(32, b"\0")
+    return auth_data
+
+
+def create_ssl_context():
+    """Create the TLS context used for the camera stream.
+
+    The printer uses a self-signed certificate, so verification is disabled.
+    """
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+class FrameParser:
+    """Incremental parser for the camera's length-prefixed JPEG stream.
+
+    Every frame on the wire is preceded by a 16-byte header whose first
+    little-endian word is the payload length. The parser owns a single
+    preallocated buffer: callers fill it through ``get_buffer()`` (typically
+    with ``sock.recv_into``) and commit the bytes with ``advance()``. In
+    length-prefixed mode the parser only ever asks for the bytes of the
+    current frame, so a frame is received straight into place and never
+    scanned or moved.
+
+    If a header does not look valid the parser falls back to scanning for
+    JPEG start/end markers, resuming each scan where the previous one
+    stopped instead of from the start of the buffer.
+
+    Frames are returned as memoryviews into the internal buffer. They are
+    only valid until the next call to ``get_buffer()``, ``feed()`` or
+    ``read_frame()``; use ``bytes(frame)`` to keep one.
+    """
+
+    def __init__(self, initial_size=256 * 1024, max_frame_size=16 * 1024 * 1024,
+                 chunk_size=4096):
+        """Initialize the parser.
+
+        Args:
+            initial_size: Initial buffer size in bytes, grown on demand
+            max_frame_size: Largest accepted frame; bigger lengths are treated as corrupt
+            chunk_size: Minimum free space offered per read in marker-scanning mode
+        """
+        self.max_frame_size = max_frame_size
+        self.chunk_size = chunk_size
+        self._buf = bytearray(max(initial_size, HEADER_SIZE, chunk_size))
+        self._view = memoryview(self._buf)
+        self.reset()
+
+    def reset(self):
+        """Discard buffered data and return to length-prefixed mode."""
+        self._start = 0
+        self._end = 0
+        self._scan = 0
+        self._frame_size = None
+        self.length_prefixed = True
+
+    def get_buffer(self):
+        """Return a writable memoryview for the next read.
+
+        In length-prefixed mode the view is sized to exactly the bytes still
+        missing from the current header or frame.
+        """
+        if self.length_prefixed:
+            if self._frame_size is None:
+                needed = HEADER_SIZE
+            else:
+                needed = HEADER_SIZE + self._frame_size
+            needed -= self._end - self._start
+        else:
+            needed = self.chunk_size
+        self._reserve(needed)
+        return self._view[self._end:self._end + needed] if self.length_prefixed \
+            else self._view[self._end:]
+
+    def advance(self, nbytes):
+        """Commit ``nbytes`` written into the view from ``get_buffer()``."""
+        self._end += nbytes
+
+    def feed(self, data):
+        """Copy ``data`` into the buffer, for transports without ``recv_into``."""
+        self._reserve(len(data))
+        self._buf[self._end:self._end + len(data)] = data
+        self._end += len(data)
+
+    def next_frame(self):
+        """Return the next complete frame as a memoryview, or None."""
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+            return None
+        if self.length_prefixed:
+            frame = self._next_prefixed_frame()
+            if frame is not None or self.length_prefixed:
+                return frame
+        return self._next_scanned_frame()
+
+    def read_frame(self, sock):
+        """Read from a blocking socket until a complete frame is available.
+
+        Args:
+            sock: Socket (or SSL socket) supporting ``recv_into``
+
+        Returns:
+            Frame as a memoryview, or None if the connection was closed
+        """
+        while True:
+            frame = self.next_frame()
+            if frame is not None:
+                return frame
+            nbytes = sock.recv_into(self.get_buffer())
+            if not nbytes:
+                return None
+            self.advance(nbytes)
+
+    def _next_prefixed_frame(self):
+        available = self._end - self._start
+        if self._frame_size is None:
+            if available < HEADER_SIZE:
+                return None
+            size = _HEADER.unpack_from(self._buf, self._start)[0]
+            if not 0 < size <= self.max_frame_size:
+                self._fall_back()
+                return None
+            self._frame_size = size
+        if available < HEADER_SIZE + self._frame_size:
+            return None
+
+        begin = self._start + HEADER_SIZE
+        end = begin + self._frame_size
+        if self._buf[begin:begin + 2] != JPEG_START[:2]:
+            self._fall_back()
+            return None
+        self._frame_size = None
+        self._start = self._scan = end
+        return self._view[begin:end]
+
+    def _next_scanned_frame(self):
+        begin = self._buf.find(JPEG_START, self._start, self._end)
+        if begin == -1:
+            # Keep a possible partial marker at the tail for the next read
+            self._start = max(self._start, self._end - len(JPEG_START) + 1)
+            self._scan = self._start
+            return None
+        self._start = begin
+        end = self._buf.find(JPEG_END, max(self._scan, begin + len(JPEG_START)), self._end)
+        if end == -1:
+            self._scan = max(begin + len(JPEG_START), self._end - len(JPEG_END) + 1)
+            return None
+        end += len(JPEG_END)
+        self._start = self._scan = end
+        return self._view[begin:end]
+
+    def _fall_back(self):
+        self.length_prefixed = False
+        self._frame_size = None
+        self._scan = self._start
+
+    def _reserve(self, needed):
+        if len(self._buf) - self._end >= needed:
+            return
+        pending = self._end - self._start
+        if pending + needed > self.max_frame_size + HEADER_SIZE and not self.length_prefixed:
+            # No frame boundary in sight; drop the garbage rather than grow forever
+            self._start = self._end = self._scan = 0
+            pending = 0
+        if pending + needed <= len(self._buf):
+            self._buf[:pending] = self._buf[self._start:self._end]
+        else:
+            buf = bytearray(max(pending + needed, 2 * len(self._buf)))
+            buf[:pending] = self._view[self._start:self._end]
+            self._buf = buf
+            self._view = memoryview(buf)
+        self._scan -= self._start
+        self._start = 0
+        self._end = pending
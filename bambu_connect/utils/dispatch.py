@@ -0,0 +1,201 @@
+import collections
+import threading
+import time
+from typing import Callable, Hashable
+
+
+INLINE = "inline"
+THREAD = "thread"
+POOL = "pool"
+
+MODES = (INLINE, THREAD, POOL)
+
+
+class StatusDispatcher:
+    """Run per-printer work off the calling thread with latest-state conflation.
+
+    Work is submitted as ``(key, task)``. At most one task per key is
+    waiting at a time: submitting again before the waiting task has started
+    replaces it, so a backlog collapses into the newest task rather than
+    growing. Tasks for the same key never run concurrently and run in
+    submission order, while different keys run in parallel in "pool" mode.
+    The queue therefore never holds more entries than there are keys.
+
+    Modes:
+        "inline"  run the task immediately on the submitting thread
+        "thread"  run tasks on one dedicated worker thread
+        "pool"    run tasks on ``workers`` threads
+    """
+    def __init__(self, mode: str = THREAD, workers: int = 4):
+        """Initialize dispatcher.
+
+        Args:
+            mode: "inline", "thread" or "pool"
+            workers: Number of worker threads in "pool" mode
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown dispatch mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.submitted = 0
+        self.conflated = 0
+        self._pending = {}
+        self._queue = collections.deque()
+        self._scheduled = set()
+        self._condition = threading.Condition()
+        self._running = True
+        self._threads = []
+        if mode != INLINE:
+            for i in range(workers if mode == POOL else 1):
+                thread = threading.Thread(target=self.__run__, name=f"StatusDispatcher-{i}",
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, key: Hashable, task: Callable[[], None]):
+        """Schedule task for key, replacing any task for key that has not started."""
+        if self.mode == INLINE:
+            self.submitted += 1
+            self.__run_task__(task)
+            return
+        with self._condition:
+            self.submitted += 1
+            if key in self._pending:
+                self.conflated += 1
+            self._pending[key] = task
+            if key not in self._scheduled:
+                self._scheduled.add(key)
+                self._queue.append(key)
+                self._condition.notify()
+
+    @property
+    def depth(self) -> int:
+        """Number of keys with a task waiting to run."""
+        return len(self._pending)
+
+    def stop(self):
+        """Stop the worker threads; tasks that have not started are discarded."""
+        with self._condition:
+            self._running = False
+            self._pending.clear()
+            self._queue.clear()
+            self._condition.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+
+    def __run__(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or not self._running)
+                if not self._running:
+                    return
+                key = self._queue.popleft()
+                task = self._pending.pop(key)
+            self.__run_task__(task)
+            with self._condition:
+                if key in self._pending:
+                    # Submitted again while running; keep per-key order
+                    self._queue.append(key)
+                    self._condition.notify()
+                else:
+                    self._scheduled.discard(key)
+
+    @staticmethod
+    def __run_task__(task):
+        try:
+            task()
+        except Exception as e:
+            print(f"Warning: Error in dispatched task: {e}")
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool() -> StatusDispatcher:
+    """The "pool" dispatcher shared by every WatchClient started with dispatcher="pool".
+
+    Work is keyed per printer, so a pool only runs work in parallel when
+    several printers share it; one pool per printer would add idle threads.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = StatusDispatcher(POOL)
+        return _shared_pool
+
+
+class StatusThrottle:
+    """Limit how often a delivery function runs.
+
+    ``offer()`` is called for every update. Deliveries are at least
+    ``1 / max_rate`` seconds apart: with ``leading`` the first update after a
+    quiet period is delivered at once, and with ``trailing`` updates that
+    arrive inside the interval are delivered once at its end. Updates that
+    are neither are left for the caller's next delivery to pick up.
+    """
+    def __init__(self, max_rate: float, deliver: Callable[[], None],
+                 leading: bool = True, trailing: bool = True):
+        """Initialize throttle.
+
+        Args:
+            max_rate: Maximum deliveries per second
+            deliver: Function run for each delivery
+            leading: Deliver immediately when the interval has passed
+            trailing: Deliver updates held back by the interval when it ends
+        """
+        if max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        if not (leading or trailing):
+            raise ValueError("At least one of leading and trailing must be enabled")
+        self.interval = 1.0 / max_rate
+        self.deliver = deliver
+        self.leading = leading
+        self.trailing = trailing
+        self.delivered = 0
+        self.held = 0
+        self._last = float("-inf")
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def offer(self, force: bool = False):
+        """Report an update; force delivers it now regardless of the rate."""
+        with self._lock:
+            now = time.monotonic()
+            if force or (self.leading and self._timer is None and now - self._last >= self.interval):
+                self.__cancel_timer__()
+                self._last = now
+            else:
+                self.held += 1
+                if self.trailing and self._timer is None:
+                    delay = max(self._last + self.interval - now, 0) if self.leading else self.interval
+                    self._timer = threading.Timer(delay, self.__fire__)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.__deliver__()
+
+    def cancel(self):
+        """Drop a scheduled trailing delivery."""
+        with self._lock:
+            self.__cancel_timer__()
+
+    def __cancel_timer__(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def __fire__(self):
+        with self._lock:
+            if self._timer is None or self._timer is not threading.current_thread():
+                return  # Cancelled or superseded by a forced delivery
+            self._timer = None
+            self._last = time.monotonic()
+        self.__deliver__()
+
+    def __deliver__(self):
+        self.delivered += 1
+        try:
+            self.deliver()
+        except Exception as e:
+            print(f"Warning: Error in throttled delivery: {e}")
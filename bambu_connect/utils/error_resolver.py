@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+import requests
+from .error_codes import PRINT_ERROR_ERRORS, HMS_ERRORS
+
+
+PENDING_DESCRIPTION = "Looking up error description..."
+UNKNOWN_DESCRIPTION = "Unknown error"
+API_URL = "https://e.bambulab.com/query.php"
+
+# Lookups that fail with these got no usable answer from the API
+_LOOKUP_ERRORS = (requests.exceptions.RequestException, ValueError, KeyError, TypeError,
+                  AttributeError)
+
+
+def _default_cache_path() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "bambu_connect", "error_descriptions.json")
+
+
+class ErrorDescriptionResolver:
+    """Resolves printer error codes to descriptions without blocking the caller.
+
+    Codes in the bundled tables are answered immediately. Unknown codes are
+    looked up on Bambu's error API by a small background pool; until that
+    finishes, ``describe()`` returns PENDING_DESCRIPTION. Results, including
+    "not found" answers, are cached on disk with a TTL, and concurrent
+    requests for the same code share a single in-flight lookup. A lookup
+    that fails to get an answer from the API is not cached; it is retried
+    after ``retry_delay``.
+    """
+
+    def __init__(self, cache_path: Optional[str] = "", ttl: float = 7 * 24 * 3600,
+                 negative_ttl: float = 24 * 3600, api_url: str = API_URL,
+                 timeout: float = 5, max_workers: int = 2, retry_delay: float = 60):
+        """Initialize resolver.
+
+        Args:
+            cache_path: JSON file for the persistent cache; "" uses the user
+                cache directory and None keeps the cache in memory only
+            ttl: Seconds a found description stays valid
+            negative_ttl: Seconds a "not found" answer is remembered
+            api_url: Error lookup endpoint
+            timeout: HTTP timeout per lookup in seconds
+            max_workers: Number of background lookup threads
+            retry_delay: Seconds before retrying a lookup that failed to
+                reach the API
+        """
+        self.cache_path = _default_cache_path() if cache_path == "" else cache_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.api_url = api_url
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="bambu-error-lookup")
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._failed = {}  # (hex_code, language) -> monotonic time of the last failed lookup
+        self._listeners = []
+        self._cache = self.__load__()
+
+    def describe(self, error_code: int, language: str = "en") -> str:
+        """Return the description if known, otherwise start a lookup.
+
+        Never blocks on the network. Returns PENDING_DESCRIPTION while a
+        lookup is outstanding and UNKNOWN_DESCRIPTION for codes the API does
+        not know.
+        """
+        hex_code = f"{error_code:08X}"
+        local = PRINT_ERROR_ERRORS.get(hex_code) or HMS_ERRORS.get(hex_code)
+        if local:
+            return local
+
+        entry = self._cache.get(f"{language}:{hex_code}")
+        if entry is not None:
+            description, fresh = self.__entry_value__(entry)
+            if not fresh:
+                self.__lookup_async__(hex_code, language)
+            return description or UNKNOWN_DESCRIPTION
+
+        self.__lookup_async__(hex_code, language)
+        return PENDING_DESCRIPTION
+
+    def resolve(self, error_code: int, language: str = "en",
+                timeout: Optional[float] = None) -> str:
+        """Return the description, waiting for a lookup if necessary."""
+        description = self.describe(error_code, language)
+        if description != PENDING_DESCRIPTION:
+            return description
+        with self._lock:
+            future = self._in_flight.get((f"{error_code:08X}", language))
+        if future is not None:
+            future.result(timeout)
+        description = self.describe(error_code, language)
+        # Still pending when the lookup failed to reach the API
+        return UNKNOWN_DESCRIPTION if description == PENDING_DESCRIPTION else description
+
+    def add_listener(self, listener: Callable[[int, str], None]):
+        """Call listener(error_code, description) whenever a lookup finishes."""
+        self._listeners.append(listener)
+
+    def __entry_value__(self, entry: Dict):
+        ttl = self.ttl if entry["description"] else self.negative_ttl
+        return entry["description"], time.time() - entry["time"] < ttl
+
+    def __lookup_async__(self, hex_code: str, language: str):
+        key = (hex_code, language)
+        with self._lock:
+            if key in self._in_flight:
+                return
+            failed = self._failed.get(key)
+            if failed is not None and time.monotonic() - failed < self.retry_delay:
+                return
+            future = self._executor.submit(self.__lookup__, hex_code, language)
+            self._in_flight[key] = future
+
+    def __lookup__(self, hex_code: str, language: str) -> Optional[str]:
+        try:
+            description = self.fetch(hex_code, language)
+        except _LOOKUP_ERRORS as e:
+            # Not cached: an outage must not hide descriptions for negative_ttl
+            print(f"Warning: Error description lookup for {hex_code} failed: {e}")
+            with self._lock:
+                self._failed[(hex_code, language)] = time.monotonic()
+                self._in_flight.pop((hex_code, language), None)
+            return None
+        with self._lock:
+            self._failed.pop((hex_code, language), None)
+            self._cache[f"{language}:{hex_code}"] = {
+                "description": description,
+                "time": time.time(),
+            }
+            self._in_flight.pop((hex_code, language), None)
+            self.__save__()
+        for listener in self._listeners:
+            try:
+                listener(int(hex_code, 16), description or UNKNOWN_DESCRIPTION)
+            except Exception as e:
+                print(f"Warning: Error in error description listener: {e}")
+        return description
+
+    def fetch(self, hex_code: str, language: str = "en") -> Optional[str]:
+        """Query the error API synchronously; returns None if the code is not found.
+
+        Raises the request or decoding error when the API gives no usable
+        answer, so the failure is retried rather than cached as not found.
+        """
+        response = requests.get(
+            self.api_url, params={"lang": language, "e": hex_code}, timeout=self.timeout
+        )
+        response.raise_for_status()  # Raise an error for non-200 responses
+        json_data = response.json()
+
+        if json_data.get("result") != 0:
+            raise ValueError(f"Error API returned result {json_data.get('result')!r}")
+        for entry in json_data["data"].get("device_error", {}).get(language, []):
+            if entry["ecode"] == hex_code and entry.get("intro"):
+                return entry["intro"]
+        return None
+
+    def __load__(self) -> Dict:
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def __save__(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: Failed to save error description cache: {e}")
+
+
+_default_resolver = None
+_default_resolver_lock = threading.Lock()
+
+
+def get_default_resolver() -> ErrorDescriptionResolver:
+    """Return the resolver PrinterStatus uses, creating it on first use."""
+    global _default_resolver
+    with _default_resolver_lock:
+        if _default_resolver is None:
+            _default_resolver = ErrorDescriptionResolver()
+        return _default_resolver
+
+
+def set_default_resolver(resolver: ErrorDescriptionResolver):
+    """Replace the resolver PrinterStatus uses, e.g. to change the cache or API URL."""
+    global _default_resolver
+    with _default_resolver_lock:
+        _default_resolver = resolver
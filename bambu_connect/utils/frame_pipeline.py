@@ -0,0 +1,195 @@
+import io
+import threading
+import time
+import zlib
+
+
+class FrameRateLimiter:
+    """Frame filter that thins a camera stream before frames are copied.
+
+    Used as a ``frame_filter``: it is called with each frame (a memoryview
+    into the receive buffer) and returns True for frames to keep, so dropped
+    frames are never copied out of the buffer.
+    """
+    def __init__(self, max_fps=None, every_nth=None):
+        """Initialize rate limiter.
+
+        Args:
+            max_fps: Maximum frames per second to keep, or None
+            every_nth: Keep only every n-th frame, or None
+        """
+        if max_fps is not None and max_fps <= 0:
+            raise ValueError("max_fps must be positive")
+        if every_nth is not None and every_nth < 1:
+            raise ValueError("every_nth must be at least 1")
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.every_nth = every_nth or 1
+        self.count = 0
+        self.next_time = 0.0
+
+    def __call__(self, frame):
+        self.count += 1
+        if (self.count - 1) % self.every_nth:
+            return False
+        if self.min_interval:
+            now = time.monotonic()
+            if now < self.next_time:
+                return False
+            # Schedule from the ideal slot so jitter does not lower the rate
+            self.next_time = max(self.next_time + self.min_interval, now)
+        return True
+
+
+class FrameChangeDetector:
+    """Frame filter that drops frames which barely differ from the last kept one.
+
+    The first stage is cheap: frames with the same JPEG length and the same
+    checksum over a sparse sample of bytes are exact repeats. Otherwise a
+    frame counts as changed when its length differs from the last kept frame
+    by more than ``threshold`` (relative), a good proxy for scene change in
+    JPEG. With ``thumbnail`` enabled (requires Pillow) the second stage
+    instead decodes a downscaled grayscale thumbnail and compares the mean
+    absolute pixel difference, as a fraction of full scale, to ``threshold``.
+
+    Comparisons are against the last kept frame, so slow drifts still come
+    through once they add up. A frame is always kept when ``heartbeat``
+    seconds have passed since the last one.
+    """
+    def __init__(self, threshold=0.01, heartbeat=30.0, samples=64, thumbnail=False,
+                 thumbnail_size=(32, 24)):
+        """Initialize change detector.
+
+        Args:
+            threshold: Minimum relative change for a frame to be kept
+            heartbeat: Seconds after which a frame is kept regardless, or None
+            samples: Number of bytes sampled for the duplicate checksum
+            thumbnail: Whether to compare decoded grayscale thumbnails
+            thumbnail_size: Thumbnail size used for the pixel comparison
+        """
+        if thumbnail:
+            try:
+                from PIL import Image, ImageChops, ImageStat
+            except ImportError:
+                raise ImportError(
+                    "Thumbnail comparison requires Pillow: pip install pillow"
+                ) from None
+            self._pil = (Image, ImageChops, ImageStat)
+        self.threshold = threshold
+        self.heartbeat = heartbeat
+        self.samples = samples
+        self.thumbnail = thumbnail
+        self.thumbnail_size = thumbnail_size
+        self.kept = 0
+        self.dropped = 0
+        self.last_time = None
+        self.last_length = None
+        self.last_checksum = None
+        self.last_thumbnail = None
+
+    def __call__(self, frame):
+        now = time.monotonic()
+        length = len(frame)
+        checksum = zlib.crc32(bytes(frame[::max(1, length // self.samples)]))
+
+        if self.last_time is not None and (
+            self.heartbeat is None or now - self.last_time < self.heartbeat
+        ):
+            if length == self.last_length and checksum == self.last_checksum:
+                self.dropped += 1
+                return False
+            if self.thumbnail:
+                thumbnail = self.__thumbnail__(frame)
+                if self.__difference__(thumbnail) <= self.threshold:
+                    self.dropped += 1
+                    return False
+            elif abs(length - self.last_length) <= self.threshold * self.last_length:
+                self.dropped += 1
+                return False
+        elif self.thumbnail:
+            thumbnail = self.__thumbnail__(frame)
+
+        self.kept += 1
+        self.last_time = now
+        self.last_length = length
+        self.last_checksum = checksum
+        if self.thumbnail:
+            self.last_thumbnail = thumbnail
+        return True
+
+    def __thumbnail__(self, frame):
+        Image = self._pil[0]
+        try:
+            img = Image.open(io.BytesIO(frame))
+            # Let the JPEG decoder downscale during decoding
+            img.draft("L", (self.thumbnail_size[0] * 4, self.thumbnail_size[1] * 4))
+            return img.convert("L").resize(self.thumbnail_size)
+        except (OSError, ValueError):
+            return None
+
+    def __difference__(self, thumbnail):
+        _, ImageChops, ImageStat = self._pil
+        if thumbnail is None or self.last_thumbnail is None:
+            return 1.0
+        difference = ImageChops.difference(thumbnail, self.last_thumbnail)
+        return ImageStat.Stat(difference).mean[0] / 255
+
+
+class OffloadedCallback:
+    """Run a frame callback on an executor instead of the socket thread.
+
+    At most ``max_pending`` frames are queued or running on the executor at a
+    time; frames arriving beyond that are dropped, so a slow consumer cannot
+    build an unbounded backlog. With a ProcessPoolExecutor the callback must
+    be picklable (a module-level function).
+    """
+    def __init__(self, callback, executor, max_pending=2):
+        """Initialize offloaded callback.
+
+        Args:
+            callback: Function to call with each frame
+            executor: concurrent.futures executor to run it on
+            max_pending: Maximum frames submitted but not yet finished
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.callback = callback
+        self.executor = executor
+        self.max_pending = max_pending
+        self.pending = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, img):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return
+            self.pending += 1
+        try:
+            future = self.executor.submit(self.callback, img)
+        except Exception:
+            # e.g. the executor was shut down; the frame never became pending
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self.__done__)
+
+    def __done__(self, future):
+        with self._lock:
+            self.pending -= 1
+        if not future.cancelled() and future.exception():
+            print(f"Warning: Error in offloaded frame callback: {future.exception()}")
+
+
+def chain_filters(*filters):
+    """Combine frame filters; a frame is kept only if every filter keeps it.
+
+    Filters run in order and stop at the first one that drops the frame, so
+    cheap filters should come first.
+    """
+    filters = [f for f in filters if f]
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return filters[0]
+    return lambda frame: all(f(frame) for f in filters)
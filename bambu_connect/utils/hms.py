@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+from .error_codes import HMS_ERRORS
+
+
+HMS_MODULES = {
+    0x03: "mc",
+    0x05: "mainboard",
+    0x07: "ams",
+    0x08: "toolhead",
+    0x0C: "xcam",
+    0x12: "ams_lite",
+}
+
+HMS_SEVERITIES = {
+    1: "fatal",
+    2: "serious",
+    3: "common",
+    4: "info",
+}
+
+_AMS_MODULES = (0x07, 0x12)
+
+# Integer-keyed index built once at import: (attr << 32) | code -> description
+HMS_INDEX: Dict[int, str] = {int(key, 16): text for key, text in HMS_ERRORS.items()}
+
+
+def _build_module_index() -> Dict[int, str]:
+    """Index descriptions by (module, code) for codes not listed for a specific part."""
+    index = {}
+    for key, text in HMS_INDEX.items():
+        module_key = ((key >> 56) << 32) | (key & 0xFFFFFFFF)
+        index.setdefault(module_key, text)
+    return index
+
+
+_MODULE_INDEX = _build_module_index()
+
+
+@dataclass(frozen=True)
+class HMSError:
+    """Decoded Health Management System entry."""
+    attr: int
+    code: int
+    module: str
+    severity: str
+    ams_index: Optional[int]
+    slot_index: Optional[int]
+    description: Optional[str]
+
+    @property
+    def error_code(self) -> str:
+        """Code in the HMS_XXXX_XXXX_XXXX_XXXX form used by the Bambu wiki."""
+        return (f"HMS_{self.attr >> 16:04X}_{self.attr & 0xFFFF:04X}"
+                f"_{self.code >> 16:04X}_{self.code & 0xFFFF:04X}")
+
+
+def lookup_hms_description(attr: int, code: int) -> Optional[str]:
+    """Find the description for an HMS code.
+
+    Tries the exact code, then the same code for the first AMS unit (the
+    tables list most AMS messages once), then any part of the same module.
+    """
+    key = (attr << 32) | code
+    text = HMS_INDEX.get(key)
+    if text is None and (attr >> 24) in _AMS_MODULES:
+        text = HMS_INDEX.get(key & ~(0xFF << 48))
+    if text is None:
+        text = _MODULE_INDEX.get(((attr >> 24) << 32) | code)
+    return text
+
+
+def decode_hms_entry(attr: int, code: int) -> HMSError:
+    """Decode one raw ``{attr, code}`` HMS entry."""
+    module_id = (attr >> 24) & 0xFF
+    ams_index = slot_index = None
+    if module_id in _AMS_MODULES:
+        unit = (attr >> 16) & 0xFF
+        ams_index = None if unit == 0xFF else unit
+        part = (attr >> 8) & 0xFF
+        if part >> 4 in (0x1, 0x2):
+            slot_index = part & 0x0F
+    return HMSError(
+        attr=attr,
+        code=code,
+        module=HMS_MODULES.get(module_id, f"0x{module_id:02X}"),
+        severity=HMS_SEVERITIES.get(code >> 16, "unknown"),
+        ams_index=ams_index,
+        slot_index=slot_index,
+        description=lookup_hms_description(attr, code),
+    )
+
+
+@lru_cache(maxsize=1024)
+def _decode_key(key: Tuple[Tuple[int, int], ...]) -> Tuple[HMSError, ...]:
+    return tuple(decode_hms_entry(attr, code) for attr, code in key)
+
+
+def decode_hms(entries: Optional[Iterable[Dict[str, Any]]]) -> Tuple[HMSError, ...]:
+    """Decode a report's ``hms`` list.
+
+    Results are cached by content, so repeated reports (or many printers
+    showing the same errors) reuse the decoded tuple instead of decoding again.
+    """
+    if not entries:
+        return ()
+    try:
+        key = tuple((int(entry["attr"]), int(entry["code"])) for entry in entries)
+    except (KeyError, TypeError, ValueError):
+        return ()
+    return _decode_key(key)
@@ -1,10 +1,34 @@
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import json
-import requests
-from .error_codes import PRINT_ERROR_ERRORS, HMS_ERRORS
+from .error_resolver import PENDING_DESCRIPTION, get_default_resolver
+from .hms import HMSError, decode_hms
+from .schema import coerce_dict, converters, model, report_field
 
 
+def _parse_dbm(value):
+    """Parse a Wi-Fi signal such as "-45dBm" into an int."""
+    if isinstance(value, str) and value.endswith("dBm"):
+        value = value[:-3]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _parse_ams_units(units):
+    """Coerce the AMS unit and tray dicts; the units stay plain dicts.
+
+    Declared deferred, so the 16 trays are only walked when ``ams.ams`` is
+    read, once per AMS instance. The result is a new list, not shared with
+    the report or other statuses.
+    """
+    if type(units) is not list:
+        return units
+    return [coerce_dict(AMSEntry, unit) if type(unit) is dict else unit for unit in units]
+
+
+@model(intern_strings=True)
 @dataclass
 class Upload:
     status: Optional[str] = None
@@ -12,6 +36,7 @@ class Upload:
     message: Optional[str] = None
 
 
+@model
 @dataclass
 class Online:
     ahb: Optional[bool] = None
@@ -19,6 +44,7 @@ class Online:
     version: Optional[int] = None
 
 
+@model(intern_strings=True)
 @dataclass
 class VTTray:
     id: Optional[str] = None
@@ -28,14 +54,14 @@ class VTTray:
     tray_type: Optional[str] = None
     tray_sub_brands: Optional[str] = None
     tray_color: Optional[str] = None
-    tray_weight: Optional[str] = None
-    tray_diameter: Optional[str] = None
-    tray_temp: Optional[str] = None
-    tray_time: Optional[str] = None
+    tray_weight: Optional[int] = None
+    tray_diameter: Optional[float] = None
+    tray_temp: Optional[int] = None
+    tray_time: Optional[int] = None
     bed_temp_type: Optional[str] = None
-    bed_temp: Optional[str] = None
-    nozzle_temp_max: Optional[str] = None
-    nozzle_temp_min: Optional[str] = None
+    bed_temp: Optional[int] = None
+    nozzle_temp_max: Optional[int] = None
+    nozzle_temp_min: Optional[int] = None
     xcam_info: Optional[str] = None
     tray_uuid: Optional[str] = None
     remain: Optional[int] = None
@@ -43,16 +69,19 @@ class VTTray:
     n: Optional[int] = None
     cali_idx: Optional[int] = None
 
+@model(intern_strings=True)
 @dataclass
 class AMSEntry:
-    humidity: Optional[str] = None
+    humidity: Optional[int] = None
     id: Optional[str] = None
-    temp: Optional[str] = None
+    temp: Optional[float] = None
     tray: Optional[List[VTTray]] = None
 
+@model(intern_strings=True)
 @dataclass
 class AMS:
-    ams: Optional[List[AMSEntry]] = None
+    # Units and trays are kept as dicts, coerced like AMSEntry and VTTray
+    ams: Optional[List[Dict[str, Any]]] = report_field(parse=_parse_ams_units, deferred=True)
     ams_exist_bits: Optional[str] = None
     tray_exist_bits: Optional[str] = None
     tray_is_bbl_bits: Optional[str] = None
@@ -65,6 +94,7 @@ class AMS:
     insert_flag: Optional[bool] = None
     power_on_flag: Optional[bool] = None
 
+@model(intern_strings=True)
 @dataclass
 class IPCam:
     ipcam_dev: Optional[str] = None
@@ -73,15 +103,15 @@ class IPCam:
     resolution: Optional[str] = None
     tutk_server: Optional[str] = None
     mode_bits: Optional[int] = None
-    resolution: Optional[str] = None
-    tutk_server: Optional[str] = None
 
 
+@model(intern_strings=True)
 @dataclass
 class LightsReport:
     node: Optional[str] = None
     mode: Optional[str] = None
 
+@model
 @dataclass
 class UpgradeState:
     sequence_id: Optional[int] = None
@@ -96,18 +126,38 @@ class UpgradeState:
     new_version_state: Optional[int] = None
     new_ver_list: Optional[List[Any]] = None
     cur_state_code: Optional[int] = None
-    idx2: Optional[Any] = None  # Add this field
-    
-    def __init__(self, **data):
-        # Initialize known fields
-        for field in self.__annotations__:
-            setattr(self, field, data.get(field))
-        
-        # Store any unknown fields in a dict
-        self.extra_fields = {k: v for k, v in data.items() 
-                           if k not in self.__annotations__}
+    idx2: Optional[Any] = None
+
+
+@model(intern_strings=True)
+@dataclass
+class ModuleVersion:
+    name: Optional[str] = None
+    sw_ver: Optional[str] = None
+    hw_ver: Optional[str] = None
+    sn: Optional[str] = None
+
+
+@model
+@dataclass
+class CommandResponse:
+    """The printer's reply to a command, matched by sequence id.
+
+    Fields other than these (e.g. ``module`` for get_version) are kept in
+    ``extra_fields``.
+    """
+    command: Optional[str] = None
+    sequence_id: Optional[str] = None
+    result: Optional[str] = None
+    reason: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the printer did not report the command as failed."""
+        return self.result is None or str(self.result).lower() == "success"
 
 
+@model
 @dataclass
 class PrinterStatus:
     upload: Optional[Upload] = None
@@ -116,11 +166,11 @@ class PrinterStatus:
     bed_temper: Optional[float] = None
     bed_target_temper: Optional[float] = None
     chamber_temper: Optional[float] = None
-    mc_print_stage: Optional[str] = None
-    heatbreak_fan_speed: Optional[str] = None
-    cooling_fan_speed: Optional[str] = None
-    big_fan1_speed: Optional[str] = None
-    big_fan2_speed: Optional[str] = None
+    mc_print_stage: Optional[str] = report_field(intern=True)
+    heatbreak_fan_speed: Optional[int] = None
+    cooling_fan_speed: Optional[int] = None
+    big_fan1_speed: Optional[int] = None
+    big_fan2_speed: Optional[int] = None
     mc_percent: Optional[int] = None
     mc_remaining_time: Optional[int] = None
     ams_status: Optional[int] = None
@@ -129,181 +179,98 @@ class PrinterStatus:
     spd_mag: Optional[int] = None
     spd_lvl: Optional[int] = None
     print_error: Optional[int] = None
-    error_description: Optional[str] = None
-    lifecycle: Optional[str] = None
-    wifi_signal: Optional[str] = None
-    gcode_state: Optional[str] = None
-    gcode_file_prepare_percent: Optional[str] = None
+    error_description: Optional[str] = report_field(derived=True)
+    lifecycle: Optional[str] = report_field(intern=True)
+    wifi_signal: Optional[int] = report_field(parse=_parse_dbm)
+    gcode_state: Optional[str] = report_field(intern=True)
+    gcode_file_prepare_percent: Optional[int] = None
     queue_number: Optional[int] = None
     queue_total: Optional[int] = None
     queue_est: Optional[int] = None
     queue_sts: Optional[int] = None
-    project_id: Optional[str] = None
-    profile_id: Optional[str] = None
-    task_id: Optional[str] = None
-    subtask_id: Optional[str] = None
-    subtask_name: Optional[str] = None
-    gcode_file: Optional[str] = None
-    stg: Optional[List[Any]] = None
+    project_id: Optional[str] = report_field(intern=True)
+    profile_id: Optional[str] = report_field(intern=True)
+    task_id: Optional[str] = report_field(intern=True)
+    subtask_id: Optional[str] = report_field(intern=True)
+    subtask_name: Optional[str] = report_field(intern=True)
+    gcode_file: Optional[str] = report_field(intern=True)
+    stg: Optional[List[Any]] = report_field(default_factory=list)
     stg_cur: Optional[int] = None
-    print_type: Optional[str] = None
+    print_type: Optional[str] = report_field(intern=True)
     home_flag: Optional[int] = None
-    mc_print_line_number: Optional[str] = None
+    mc_print_line_number: Optional[int] = None
     mc_print_sub_stage: Optional[int] = None
-    sdcard: Optional[bool] = None
-    force_upgrade: Optional[bool] = None
-    mess_production_state: Optional[str] = None
+    sdcard: Optional[bool] = False
+    force_upgrade: Optional[bool] = False
+    mess_production_state: Optional[str] = report_field(intern=True)
     layer_num: Optional[int] = None
     total_layer_num: Optional[int] = None
-    s_obj: Optional[List[Any]] = None
+    s_obj: Optional[List[Any]] = report_field(default_factory=list)
     fan_gear: Optional[int] = None
-    hms: Optional[List[Any]] = None
+    hms: Optional[List[Any]] = report_field(default_factory=list)
+    hms_errors: Optional[Tuple[HMSError, ...]] = report_field(derived=True)
     online: Optional[Online] = None
     ams: Optional[AMS] = None
     ipcam: Optional[IPCam] = None
     vt_tray: Optional[VTTray] = None
-    lights_report: Optional[List[LightsReport]] = None
+    lights_report: Optional[List[LightsReport]] = report_field(default_factory=list)
     upgrade_state: Optional[UpgradeState] = None
-    command: Optional[str] = None
+    command: Optional[str] = report_field(intern=True)
     msg: Optional[int] = None
     sequence_id: Optional[str] = None
 
-    def __init__(self, **data):
-        # Handle known nested objects first
-        if "upload" in data:
-            self.upload = Upload(**data["upload"])
-        else:
-            self.upload = None
-            
-        if "online" in data:
-            self.online = Online(**data["online"])
-        else:
-            self.online = None
-            
-        if "ams" in data:
-            self.ams = AMS(**data["ams"])
-        else:
-            self.ams = None
-            
-        if "ipcam" in data:
-            self.ipcam = IPCam(**data["ipcam"])
-        else:
-            self.ipcam = None
-            
-        if "vt_tray" in data:
-            self.vt_tray = VTTray(**data["vt_tray"])
-        else:
-            self.vt_tray = None
-            
-        if "lights_report" in data:
-            self.lights_report = [LightsReport(**lr) for lr in data.get("lights_report", [])]
-        else:
-            self.lights_report = []
-            
-        if "upgrade_state" in data:
-            try:
-                self.upgrade_state = UpgradeState(**data["upgrade_state"])
-            except Exception as e:
-                print(f"Warning: Failed to parse upgrade_state: {e}")
-                self.upgrade_state = None
-        else:
-            self.upgrade_state = None
-        
-        # Handle all other fields
-        for field in self.__annotations__:
-            if field not in ['upload', 'online', 'ams', 'ipcam', 'vt_tray', 
-                           'lights_report', 'upgrade_state']:
-                setattr(self, field, data.get(field))
-        
-        # Store any unknown fields
-        self.extra_fields = {k: v for k, v in data.items() 
-                           if k not in self.__annotations__ and 
-                           k not in ['upload', 'online', 'ams', 'ipcam', 'vt_tray', 
-                                   'lights_report', 'upgrade_state']}
-
-    def __init__(self, **data):
-        self.upload = Upload(**data["upload"]) if "upload" in data else None
-        self.nozzle_temper = data.get("nozzle_temper")
-        self.nozzle_target_temper = data.get("nozzle_target_temper")
-        self.bed_temper = data.get("bed_temper")
-        self.bed_target_temper = data.get("bed_target_temper")
-        self.chamber_temper = data.get("chamber_temper")
-        self.mc_print_stage = data.get("mc_print_stage")
-        self.heatbreak_fan_speed = data.get("heatbreak_fan_speed")
-        self.cooling_fan_speed = data.get("cooling_fan_speed")
-        self.big_fan1_speed = data.get("big_fan1_speed")
-        self.big_fan2_speed = data.get("big_fan2_speed")
-        self.mc_percent = data.get("mc_percent")
-        self.mc_remaining_time = data.get("mc_remaining_time")
-        self.ams_status = data.get("ams_status")
-        self.ams_rfid_status = data.get("ams_rfid_status")
-        self.hw_switch_state = data.get("hw_switch_state")
-        self.spd_mag = data.get("spd_mag")
-        self.spd_lvl = data.get("spd_lvl")
-        self.print_error = data.get("print_error")
-        self.lifecycle = data.get("lifecycle")
-        self.wifi_signal = data.get("wifi_signal")
-        self.gcode_state = data.get("gcode_state")
-        self.gcode_file_prepare_percent = data.get("gcode_file_prepare_percent")
-        self.queue_number = data.get("queue_number")
-        self.queue_total = data.get("queue_total")
-        self.queue_est = data.get("queue_est")
-        self.queue_sts = data.get("queue_sts")
-        self.project_id = data.get("project_id")
-        self.profile_id = data.get("profile_id")
-        self.task_id = data.get("task_id")
-        self.subtask_id = data.get("subtask_id")
-        self.subtask_name = data.get("subtask_name")
-        self.gcode_file = data.get("gcode_file")
-        self.stg = data.get("stg", [])
-        self.stg_cur = data.get("stg_cur")
-        self.print_type = data.get("print_type")
-        self.home_flag = data.get("home_flag")
-        self.mc_print_line_number = data.get("mc_print_line_number")
-        self.mc_print_sub_stage = data.get("mc_print_sub_stage")
-        self.sdcard = data.get("sdcard", False)
-        self.force_upgrade = data.get("force_upgrade", False)
-        self.mess_production_state = data.get("mess_production_state")
-        self.layer_num = data.get("layer_num")
-        self.total_layer_num = data.get("total_layer_num")
-        self.s_obj = data.get("s_obj", [])
-        self.fan_gear = data.get("fan_gear")
-        self.hms = data.get("hms", [])
-        self.online = Online(**data["online"]) if "online" in data else None
-        self.ams = AMS(**data["ams"]) if "ams" in data else None
-        self.ipcam = IPCam(**data["ipcam"]) if "ipcam" in data else None
-        self.vt_tray = VTTray(**data["vt_tray"]) if "vt_tray" in data else None
-        self.lights_report = [LightsReport(**lr) for lr in data.get("lights_report", [])]
-        self.upgrade_state = UpgradeState(**data["upgrade_state"]) if "upgrade_state" in data else None
-        self.command = data.get("command")
-        self.msg = data.get("msg")
-        self.sequence_id = data.get("sequence_id")
-        self.error_description = self.get_error_description(self.print_error) if self.print_error else "No error"
+    def __post_init__(self):
+        self.hms_errors = decode_hms(self.hms)
+        self.error_description = self.describe_error(self.print_error) if self.print_error else "No error"
+
+    def apply_delta(self, delta: Dict[str, Any], lazy: bool = False) -> "PrinterStatus":
+        """Return a new status with a report delta applied.
+
+        Equivalent to rebuilding from the merged values, but only the keys
+        present in ``delta`` are parsed; every other attribute, including
+        unchanged nested sections, is shared with this instance. With lazy,
+        nested sections in the delta are parsed on first access.
+        """
+        parsers = _LAZY_CONVERTERS if lazy else _CONVERTERS
+        status = PrinterStatus.__new__(PrinterStatus)
+        for name in _SLOTS:
+            setattr(status, name, getattr(self, name))
+        for key, value in delta.items():
+            if key in parsers:
+                convert = parsers[key]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                setattr(status, key, value)
+            elif key not in _DERIVED_FIELDS:
+                if status.extra_fields is self.extra_fields:
+                    status.extra_fields = dict(self.extra_fields)
+                status.extra_fields[key] = value
+        if "hms" in delta:
+            status.hms_errors = decode_hms(status.hms)
+        # A pending description is looked up again until the resolver has it
+        if "print_error" in delta or status.error_description == PENDING_DESCRIPTION:
+            status.error_description = (
+                self.describe_error(status.print_error) if status.print_error else "No error"
+            )
+        return status
 
     @staticmethod
     def get_error_description(error_code: int, language: str = "en") -> str:
-        """Fetch the human-readable error description for a given error code."""
-        hex_code = f"{error_code:08X}"  # Convert int to 8-character hex
-
-        # First, check local dictionaries
-        if hex_code in PRINT_ERROR_ERRORS:
-            return PRINT_ERROR_ERRORS[hex_code]
-
-        if hex_code in HMS_ERRORS:
-            return HMS_ERRORS[hex_code]
-
-        # If not found locally, fetch from Bambu API
-        api_url = f"https://e.bambulab.com/query.php?lang={language}&e={hex_code}"
-        try:
-            response = requests.get(api_url, timeout=5)
-            response.raise_for_status()  # Raise an error for non-200 responses
-            json_data = response.json()
-
-            if json_data.get("result") == 0:
-                for entry in json_data["data"].get("device_error", {}).get(language, []):
-                    if entry["ecode"] == hex_code and entry.get("intro"):
-                        return entry["intro"]
-        except requests.exceptions.RequestException:
-            pass  # Avoid throwing an exception—fallback to "Unknown error"
-
-        return "Unknown error"
+        """Fetch the human-readable error description for a given error code.
+
+        Blocks until an unknown code has been looked up; status objects use
+        the non-blocking ``describe_error`` instead.
+        """
+        return get_default_resolver().resolve(error_code, language)
+
+    @staticmethod
+    def describe_error(error_code: int) -> str:
+        """Return the cached description, or a pending placeholder while it is looked up."""
+        return get_default_resolver().describe(error_code)
+
+
+# Per-key converters for incremental updates, generated from the field declarations
+_CONVERTERS = converters(PrinterStatus)
+_LAZY_CONVERTERS = converters(PrinterStatus, lazy=True)
+_DERIVED_FIELDS = frozenset(("error_description", "hms_errors"))
+_SLOTS = PrinterStatus.__slots__
@@ -0,0 +1,41 @@
+import time
+
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Tokens refill at ``rate`` per second up to ``burst``; each operation
+    takes one, so short bursts go out at once while the sustained rate is
+    capped. Not thread-safe: guard it with the caller's lock.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        """Initialize token bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum tokens held, i.e. operations allowed back to back
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def __refill__(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        self.__refill__(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> bool:
+        """Take a token if one is available."""
+        if self.delay() > 0:
+            return False
+        self.tokens -= 1
+        return True
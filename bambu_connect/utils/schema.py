@@ -0,0 +1,497 @@
+import json
+import sys
+import typing
+from dataclasses import MISSING, field, fields, is_dataclass
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Field kinds
+PLAIN = "plain"
+CONVERT = "convert"
+MODEL = "model"
+MODEL_LIST = "model_list"
+DEFERRED = "deferred"
+
+_MISSING = object()
+
+# Whether fields declared with intern / intern_strings are interned; see
+# set_string_interning
+_interning = False
+
+
+def to_int(value):
+    """Coerce a report value to int, leaving values that are not numbers unchanged."""
+    if value is None or type(value) is int:
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError, OverflowError):
+            return value
+
+
+def to_float(value):
+    """Coerce a report value to float, leaving values that are not numbers unchanged."""
+    if value is None or type(value) is float:
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def intern_str(value):
+    """Intern strings so repeated values share one object across statuses."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def set_string_interning(enabled: bool = True):
+    """Turn string interning of report models on or off for all models.
+
+    Off by default, as every interned string costs a lookup while parsing. Turn it on
+    when many statuses are kept in memory: string fields declared with
+    ``intern`` or ``intern_strings`` are then interned. Deferred fields
+    still keep their raw value until first access. The parsers are
+    regenerated, so call it before creating statuses.
+    """
+    global _interning
+    _interning = bool(enabled)
+    for cls in _SPECS:  # Declaration order, so nested models are rebuilt first
+        _build(cls)
+    for cls, lazy, table in _CONVERTER_TABLES:
+        table.update(_converters(cls, lazy))
+
+
+def string_interning() -> bool:
+    """Whether report models currently intern strings."""
+    return _interning
+
+
+_COERCERS = {int: to_int, float: to_float}
+
+
+class _NoExtraFields(dict):
+    """Shared, read-only ``extra_fields`` for models without unknown keys."""
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("extra_fields of a model without unknown keys is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return _no_extra_fields, ()
+
+
+def _no_extra_fields():
+    return NO_EXTRA_FIELDS
+
+
+NO_EXTRA_FIELDS = _NoExtraFields()
+
+
+def report_field(default=None, *, parse: Callable[[Any], Any] = None, intern: bool = False,
+                 derived: bool = False, default_factory=MISSING, deferred: bool = False):
+    """Declare a model field with parsing options.
+
+    Args:
+        default: Value used when the key is missing from the report
+        parse: Converter applied to the raw value instead of the one implied
+            by the annotation
+        intern: Intern string values while set_string_interning is on
+            (models declared with ``intern_strings=True`` intern every
+            string field)
+        derived: Computed after parsing rather than read from the report
+        default_factory: Called for a fresh default when the key is missing
+        deferred: Run ``parse`` on first attribute access instead of while
+            parsing, for costly values that are seldom read
+    """
+    if deferred and parse is None:
+        raise ValueError("deferred fields need a parse function")
+    metadata = {"parse": parse, "intern": intern, "derived": derived, "deferred": deferred}
+    if default_factory is not MISSING:
+        return field(default_factory=default_factory, metadata=metadata)
+    return field(default=default, metadata=metadata)
+
+
+def model(cls=None, *, intern_strings: bool = False):
+    """Turn a dataclass into a compact report model.
+
+    The class is rebuilt with ``__slots__`` (as ``dataclass(slots=True)``
+    does on Python 3.10+) and gets a parser generated from its fields: each
+    field is read from the report dict, coerced according to its annotation
+    (``int``, ``float``, nested models and lists of models) or its
+    ``report_field`` options, and unknown keys are kept in ``extra_fields``
+    (a shared read-only empty dict when there are none).
+    ``__post_init__``, if defined, runs after parsing.
+
+    The generated parser replaces ``__init__`` (which takes the report as
+    keyword arguments) and is available without the keyword-argument copy
+    as ``cls.from_report(data, lazy=False)``. With ``lazy``, nested models
+    keep their raw report value and are parsed on first attribute access.
+
+    Models also get ``to_dict()``, ``to_json()`` and ``to_msgpack()``.
+    """
+    def wrap(cls):
+        hints = typing.get_type_hints(cls)
+        spec = {f.name: _field_kind(f, hints[f.name], intern_strings)
+                for f in fields(cls) if not f.metadata.get("derived")}
+        lazy = [name for name, (kind, _) in spec.items()
+                if kind in (MODEL, MODEL_LIST, DEFERRED)]
+        cls = _slotted(cls, lazy)
+        _SLOTS[cls] = {name: cls.__dict__[_storage(name)] for name in lazy}
+        _SPECS[cls] = spec
+        _build(cls)
+        cls.to_json = to_json
+        cls.to_msgpack = to_msgpack
+        return cls
+    return wrap if cls is None else wrap(cls)
+
+
+def coerce_dict(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a model's coercions to a report dict, keeping it a dict.
+
+    Nested models are coerced as dicts too. Used for report sections that
+    are exposed as raw dicts, such as the AMS units.
+    """
+    return _DICT_COERCERS[cls](data)
+
+
+def converters(cls, lazy: bool = False) -> Dict[str, Callable[[Any], Any]]:
+    """Return per-field functions converting a raw report value for cls.
+
+    Fields that are stored as received map to None. With lazy, nested
+    models are wrapped for parsing on first access instead of parsed;
+    deferred fields always are. The returned dict is updated in place by
+    set_string_interning.
+    """
+    table = _converters(cls, lazy)
+    _CONVERTER_TABLES.append((cls, lazy, table))
+    return table
+
+
+def _converters(cls, lazy):
+    result = {}
+    for name, (kind, arg) in _SPECS[cls].items():
+        if kind == DEFERRED:
+            result[name] = _Raw
+        elif lazy and kind == MODEL:
+            result[name] = lambda value: _Raw(value) if type(value) is dict else value
+        elif lazy and kind == MODEL_LIST:
+            result[name] = lambda value: _Raw(value) if type(value) is list else value
+        else:
+            result[name] = _converter(kind, arg)
+    return result
+
+
+def to_json(self, skip_none: bool = False) -> str:
+    """Serialize to a compact JSON string, using orjson when it is installed."""
+    data = self.to_dict(skip_none)
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode()
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the json module handles them
+    return json.dumps(data, separators=(",", ":"))
+
+
+def to_msgpack(self, skip_none: bool = False) -> bytes:
+    """Serialize to MessagePack; requires the msgpack package."""
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("MessagePack encoding requires msgpack: pip install msgpack") from None
+    return msgpack.packb(self.to_dict(skip_none), use_bin_type=True)
+
+
+def to_plain(value, skip_none: bool = False):
+    """Convert models and other dataclasses inside value to dicts.
+
+    Lists and tuples are rebuilt; dicts and other values are returned as is.
+    """
+    if hasattr(value, "to_dict"):
+        return value.to_dict(skip_none)
+    if is_dataclass(value) and not isinstance(value, type):
+        result = {f.name: to_plain(getattr(value, f.name), skip_none) for f in fields(value)}
+        return {k: v for k, v in result.items() if v is not None} if skip_none else result
+    if type(value) in (list, tuple):
+        return type(value)(to_plain(v, skip_none) for v in value)
+    return value
+
+
+class _Raw:
+    """Raw report value of a lazily parsed section."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class _LazySection:
+    """Descriptor parsing a nested model or deferred field the first time it is read.
+
+    The value lives in a ``_<name>`` slot; a ``_Raw`` there is parsed,
+    stored back and returned, so later reads cost one type check.
+    """
+    __slots__ = ("slot", "parse")
+
+    def __init__(self, slot, parse):
+        self.slot = slot
+        self.parse = parse
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = self.slot.__get__(obj, owner)
+        if value.__class__ is _Raw:
+            value = self.parse(value.value)
+            self.slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+
+def _storage(name):
+    return f"_{name}"
+
+
+def _converter(kind, arg):
+    if kind == CONVERT and arg is intern_str and not _interning:
+        return None
+    if kind in (CONVERT, DEFERRED):
+        return arg
+    if kind == MODEL:
+        parse = arg.from_report
+        return lambda value: parse(value) if type(value) is dict else value
+    if kind == MODEL_LIST:
+        parse = arg.from_report
+        return lambda value: ([parse(v) if type(v) is dict else v for v in value]
+                              if type(value) is list else value)
+    return None
+
+
+# model class -> {field name: (kind, converter or nested model)}
+_SPECS = {}
+# model class -> {lazily parsed field name: slot descriptor holding its value}
+_SLOTS = {}
+# model class -> generated function coercing a report dict
+_DICT_COERCERS = {}
+# (model class, lazy, dict) for every converters() result
+_CONVERTER_TABLES = []
+
+
+def _build(cls):
+    """Generate the parsers of a model and its lazily parsed fields' descriptors."""
+    _compile(cls)
+    spec = _SPECS[cls]
+    for name, slot in _SLOTS[cls].items():
+        setattr(cls, name, _LazySection(slot, _converter(*spec[name])))
+
+
+def _slotted(cls, lazy=()):
+    names = tuple(_storage(f.name) if f.name in lazy else f.name
+                  for f in fields(cls)) + ("extra_fields",)
+    field_names = {f.name for f in fields(cls)}
+    namespace = {k: v for k, v in cls.__dict__.items()
+                 if k not in field_names and k not in ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+
+def _field_kind(f, hint, intern_strings):
+    """Work out how a field is parsed from its metadata and annotation."""
+    if f.metadata.get("parse"):
+        return DEFERRED if f.metadata.get("deferred") else CONVERT, f.metadata["parse"]
+
+    # Unwrap Optional[X]
+    args = [a for a in typing.get_args(hint) if a is not type(None)]
+    if typing.get_origin(hint) is typing.Union and len(args) == 1:
+        hint = args[0]
+
+    if typing.get_origin(hint) in (list, typing.List):
+        item = (typing.get_args(hint) or (Any,))[0]
+        if is_dataclass(item):
+            return MODEL_LIST, item
+        return PLAIN, None
+    if is_dataclass(hint):
+        return MODEL, hint
+    if hint in _COERCERS:
+        return CONVERT, _COERCERS[hint]
+    if hint is str and (intern_strings or f.metadata.get("intern")):
+        return CONVERT, intern_str
+    return PLAIN, None
+
+
+def _compile(cls):
+    spec = _SPECS[cls]
+    namespace = {"_MISSING": _MISSING, "cls": cls, "new": object.__new__, "Raw": _Raw,
+                 "plain": to_plain,
+                 "NO_EXTRA_FIELDS": NO_EXTRA_FIELDS,
+                 "to_int": to_int, "to_float": to_float, "intern": sys.intern}
+    eager = []
+    lazy = []
+    # __init__ takes each field as a keyword so Python binds the report keys
+    # itself; from_report reads them from the dict
+    params = []
+    init = []
+    coerce_lines = ["def coerce(data):", "    result = dict(data)", "    get = data.get"]
+    # to_dict reads every field into a dict literal, then converts the nested ones
+    to_dict_items = []
+    to_dict_lines = []
+    known = set()
+
+    for f in fields(cls):
+        name = f.name
+        known.add(name)
+        to_dict_items.append(f"{name!r}: self.{name}")
+        if name in namespace or name in ("self", "extra", "v"):
+            raise TypeError(f"{cls.__name__}.{name} clashes with a name used by the generated parser")
+        if name not in spec:  # Derived
+            params.append(f"{name}=None")
+            eager.append(f"    self.{name} = None")
+            lazy.append(eager[-1])
+            init.append(eager[-1])
+            to_dict_lines.append(f"    result[{name!r}] = plain(result[{name!r}], skip_none)")
+            continue
+
+        kind, arg = spec[name]
+        expr = _convert_expr(name, kind, arg, namespace)
+        if f.default_factory is not MISSING:
+            namespace[f"factory_{name}"] = f.default_factory
+            params.append(f"{name}=_MISSING")
+            read = [f"    v = get({name!r}, _MISSING)",
+                    f"    if v is _MISSING:",
+                    f"        v = factory_{name}()"]
+            init += [f"    v = {name}",
+                     f"    if v is _MISSING:",
+                     f"        v = factory_{name}()"]
+        elif f.default is MISSING or f.default is None:
+            params.append(f"{name}=None")
+            if expr == "v":
+                # Stored as received: no temporary needed
+                eager.append(f"    self.{name} = get({name!r})")
+                lazy.append(eager[-1])
+                init.append(f"    self.{name} = {name}")
+                continue
+            read = [f"    v = get({name!r})"]
+            init.append(f"    v = {name}")
+        else:
+            namespace[f"default_{name}"] = f.default
+            params.append(f"{name}=default_{name}")
+            read = [f"    v = get({name!r}, default_{name})"]
+            init.append(f"    v = {name}")
+        eager += read
+        lazy += read
+
+        if kind == DEFERRED:
+            attr = _storage(name)
+            lazy.append(f"    self.{attr} = {expr}")
+        elif kind in (MODEL, MODEL_LIST):
+            attr = _storage(name)
+            raw_type = "dict" if kind == MODEL else "list"
+            lazy.append(f"    self.{attr} = Raw(v) if v.__class__ is {raw_type} else v")
+        else:
+            attr = name
+            lazy.append(f"    self.{attr} = {expr}")
+        eager.append(f"    self.{attr} = {expr}")
+        init.append(eager[-1])
+
+        if kind in (MODEL, MODEL_LIST):
+            namespace[f"model_{name}"] = arg
+            to_dict_lines.append(f"    v = result[{name!r}]")
+            if kind == MODEL:
+                to_dict_lines.append(f"    if v.__class__ is model_{name}:")
+                to_dict_lines.append(f"        result[{name!r}] = v.to_dict(skip_none)")
+            else:
+                to_dict_lines.append(f"    if v.__class__ is list:")
+                to_dict_lines.append(f"        result[{name!r}] = [i.to_dict(skip_none) if i.__class__ is"
+                                     f" model_{name} else i for i in v]")
+
+        if kind != PLAIN:
+            coerce_lines += [
+                f"    v = get({name!r})",
+                f"    if v is not None:",
+                f"        result[{name!r}] = {_convert_expr(name, kind, arg, namespace, as_dict=True)}",
+            ]
+
+    namespace["known"] = frozenset(known)
+    finish = [
+        "    if known.issuperset(data):",
+        "        self.extra_fields = NO_EXTRA_FIELDS",
+        "    else:",
+        "        self.extra_fields = {k: v for k, v in data.items() if k not in known}",
+    ]
+    post_init = ["    self.__post_init__()"] if hasattr(cls, "__post_init__") else []
+    # The field reads are inlined in both entry points to save a call per model
+    lines = (
+        ["def __init__(self, *, " + "".join(p + ", " for p in params) + "**extra):"] + init
+        + ["    self.extra_fields = extra if extra else NO_EXTRA_FIELDS"] + post_init
+        + ["", "def from_report(data, lazy=False):", "    self = new(cls)", "    get = data.get",
+           "    if lazy:"]
+        + ["    " + line for line in lazy] + ["    else:"] + ["    " + line for line in eager]
+        + finish + post_init + ["    return self", ""]
+        + coerce_lines + ["    return result", ""]
+        + ["def to_dict(self, skip_none=False):",
+           "    result = {" + ", ".join(to_dict_items) + "}"]
+        + to_dict_lines
+        + ["    if skip_none:",
+           "        return {k: v for k, v in result.items() if v is not None}",
+           "    return result"]
+    )
+
+    exec("\n".join(lines), namespace)
+    __init__ = namespace["__init__"]
+    __init__.__qualname__ = f"{cls.__qualname__}.__init__"
+    __init__.__doc__ = f"Parse a {cls.__name__} from report keys."
+    cls.__init__ = __init__
+    cls.from_report = staticmethod(namespace["from_report"])
+    to_dict = namespace["to_dict"]
+    to_dict.__qualname__ = f"{cls.__qualname__}.to_dict"
+    to_dict.__doc__ = ("Return the fields as a dict, like dataclasses.asdict() but without "
+                       "copying plain lists and dicts; skip_none drops None fields.")
+    cls.to_dict = to_dict
+    _DICT_COERCERS[cls] = namespace["coerce"]
+
+
+def _convert_expr(name, kind, arg, namespace, as_dict=False):
+    """Source for converting the raw value ``v`` of a field.
+
+    The common cases are inlined so values that already have the right type
+    skip the function call. With as_dict, nested models stay dicts.
+    """
+    if kind == CONVERT and arg is to_int:
+        return "v if v.__class__ is int or v is None else to_int(v)"
+    if kind == CONVERT and arg is to_float:
+        return "v if v.__class__ is float or v is None else to_float(v)"
+    if kind == CONVERT and arg is intern_str:
+        return "intern(v) if v.__class__ is str else v" if _interning else "v"
+    if kind == DEFERRED:
+        if as_dict:
+            namespace[f"parse_{name}"] = arg
+            return f"parse_{name}(v)"
+        return "v if v is None else Raw(v)"
+    if kind == CONVERT:
+        namespace[f"parse_{name}"] = arg
+        return f"v if v is None else parse_{name}(v)"
+    if kind in (MODEL, MODEL_LIST):
+        if as_dict:
+            namespace[f"coerce_{name}"] = _DICT_COERCERS[arg]
+            parse = f"coerce_{name}"
+        else:
+            namespace[f"parse_{name}"] = arg.from_report
+            parse = f"parse_{name}"
+        if kind == MODEL:
+            return f"{parse}(v) if v.__class__ is dict else v"
+        return f"[{parse}(i) if i.__class__ is dict else i for i in v] if v.__class__ is list else v"
+    return "v"
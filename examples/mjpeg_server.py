@@ -0,0 +1,26 @@
+from bambu_connect.CameraClient import CameraClient
+from bambu_connect.MjpegServer import MjpegServer
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+# Replace these with your actual details
+hostname = os.getenv('HOSTNAME')
+access_code = os.getenv('ACCESS_CODE')
+
+
+def main():
+    server = MjpegServer({"printer": CameraClient(hostname, access_code)}, port=8080)
+    server.start()
+
+    try:
+        print("Open http://localhost:8080/printer/stream in a browser.")
+        input("Press Enter to stop the server...\n")
+    finally:
+        server.stop()
+        print("Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 import time
 from bambu_connect import BambuClient, PrinterStatus
-from dataclasses import asdict
 import pprint
 from dotenv import load_dotenv
 import os
@@ -14,7 +13,7 @@ serial = os.getenv('SERIAL')
 
 
 def custom_callback(msg: PrinterStatus):
-    printer_status_dict = asdict(msg)
+    printer_status_dict = msg.to_dict()
     pprint.pprint(printer_status_dict)
 
 
@@ -0,0 +1,76 @@
+"""Compare CPU use of thread-per-camera streaming against CameraMultiplexer.
+
+Runs the fake camera in a separate process so only client-side CPU is
+measured, then reports process CPU time per wall-clock second for 100 streams.
+"""
+from bambu_connect.CameraClient import CameraClient
+from bambu_connect.CameraMultiplexer import CameraMultiplexer
+import os
+import subprocess
+import sys
+import time
+
+STREAMS = 100
+SECONDS = 5
+FPS = 15
+FRAME_SIZE = 60000
+
+
+class Counter:
+    def __init__(self):
+        self.frames = 0
+
+    def __call__(self, img):
+        self.frames += 1
+
+
+def measure(start, stop, counters):
+    start()
+    time.sleep(2)  # let connections settle
+    frames_before = sum(c.frames for c in counters)
+    cpu_before, wall_before = time.process_time(), time.monotonic()
+    time.sleep(SECONDS)
+    cpu = time.process_time() - cpu_before
+    wall = time.monotonic() - wall_before
+    frames = sum(c.frames for c in counters) - frames_before
+    stop()
+    return cpu / wall, frames / wall
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(here, "fake_camera.py"), "--port", "0",
+         "--fps", str(FPS), "--frame-size", str(FRAME_SIZE)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    port = int(server.stdout.readline().rsplit(":", 1)[1])
+
+    try:
+        clients = [CameraClient("127.0.0.1", "12345678", port=port) for _ in range(STREAMS)]
+
+        counters = [Counter() for _ in clients]
+        cpu, fps = measure(
+            lambda: [c.start_stream(n) for c, n in zip(clients, counters)],
+            lambda: [c.stop_stream() for c in clients],
+            counters,
+        )
+        print(f"thread per stream:      {cpu * 100:6.1f}% CPU, {fps:7.1f} frames/s")
+
+        for threads in (1, 4):
+            counters = [Counter() for _ in clients]
+            mux = CameraMultiplexer(threads=threads)
+
+            def start():
+                mux.start()
+                for client, counter in zip(clients, counters):
+                    mux.add(client, counter)
+
+            cpu, fps = measure(start, mux.stop, counters)
+            print(f"multiplexer, {threads} thread(s): {cpu * 100:6.1f}% CPU, {fps:7.1f} frames/s")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
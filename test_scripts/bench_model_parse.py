@@ -0,0 +1,53 @@
+"""Compare PrinterStatus parsing speed against models from an earlier revision.
+
+Usage: python bench_model_parse.py [git-revision]
+
+The revision defaults to the first commit in the repository. The versions
+are timed in turns within each repeat, so load changes on a busy host hit
+all of them alike.
+"""
+from bambu_connect.utils import models, schema
+from bench_status_memory import load_models
+from sample_report import FULL_REPORT
+import copy
+import sys
+import timeit
+
+
+REPEAT = 7
+NUMBER = 2000
+
+
+def fresh(section):
+    """Copies of a report section, so no parse result can be reused between calls."""
+    copies = iter([copy.deepcopy(section) for _ in range(3 * NUMBER * REPEAT)])  # All versions
+    return lambda: next(copies)
+
+
+def main():
+    baseline = load_models(sys.argv[1] if len(sys.argv) > 1 else None)
+    # Numeric tray values already sent as numbers: the same work for all
+    # versions, so the difference is the parsing machinery alone
+    typed_tray = models.coerce_dict(models.VTTray, FULL_REPORT["vt_tray"])
+    cases = {
+        "full report": lambda m, report=fresh(FULL_REPORT): m.PrinterStatus(**report()),
+        "vt_tray": lambda m, tray=fresh(FULL_REPORT["vt_tray"]): m.VTTray(**tray()),
+        "vt_tray typed": lambda m, tray=fresh(typed_tray): m.VTTray(**tray()),
+        "upgrade_state": lambda m: m.UpgradeState(**FULL_REPORT["upgrade_state"]),
+    }
+    versions = [(baseline, False), (models, False), (models, True)]
+    print(f"{'model':>14} {'original (us)':>14} {'generated (us)':>15} {'interned (us)':>14}")
+    for name, case in cases.items():
+        best = [float("inf")] * len(versions)
+        for _ in range(REPEAT):
+            for i, (module, interning) in enumerate(versions):
+                if module is models:
+                    schema.set_string_interning(interning)
+                seconds = timeit.timeit(lambda: case(module), number=NUMBER)
+                best[i] = min(best[i], seconds / NUMBER * 1e6)
+        schema.set_string_interning(False)
+        print(f"{name:>14} {best[0]:>14.1f} {best[1]:>15.1f} {best[2]:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
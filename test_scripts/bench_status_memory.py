@@ -0,0 +1,85 @@
+"""Compare memory held by a history of PrinterStatus objects against the original models.
+
+Usage: python bench_status_memory.py [git-revision]
+
+The original models are loaded from the given revision (default: the first
+commit in the repository) next to the current ones.
+"""
+from bambu_connect.utils import models, schema
+from sample_report import FULL_REPORT
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+HISTORY = 2000
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_models(revision):
+    if revision is None:
+        revision = subprocess.check_output(
+            ["git", "rev-list", "--max-parents=0", "HEAD"], cwd=REPO, text=True
+        ).split()[0]
+    source = subprocess.check_output(
+        ["git", "show", f"{revision}:bambu_connect/utils/models.py"], cwd=REPO
+    )
+    path = os.path.join(tempfile.mkdtemp(), "models.py")
+    with open(path, "wb") as f:
+        f.write(source)
+    # Load inside the package so the module's relative imports resolve
+    spec = importlib.util.spec_from_file_location("bambu_connect.utils._baseline_models", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def reports(fresh):
+    """Yield report dicts for a print in progress.
+
+    fresh=True decodes every report from JSON, as when the printer sends full
+    reports; otherwise unchanged sections are shared, as WatchClient's merged
+    values are between deltas.
+    """
+    payload = json.dumps(FULL_REPORT)
+    values = json.loads(payload)
+    for i in range(HISTORY):
+        report = json.loads(payload) if fresh else dict(values)
+        report["mc_percent"] = i % 100
+        report["nozzle_temper"] = 200 + i % 7 * 0.1
+        report["sequence_id"] = str(i)
+        yield report
+
+
+def measure(status_class, fresh):
+    """Bytes still allocated once the reports themselves have been dropped."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    history = [status_class(**report) for report in reports(fresh)]
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del history
+    return held
+
+
+def main():
+    baseline = load_models(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"{HISTORY} statuses held in memory")
+    print(f"{'reports':>8} {'original (KiB)':>15} {'compact (KiB)':>14} {'saving':>7} "
+          f"{'interned (KiB)':>15} {'saving':>7}")
+    for fresh in (True, False):
+        original = measure(baseline.PrinterStatus, fresh)
+        compact = measure(models.PrinterStatus, fresh)
+        schema.set_string_interning(True)
+        interned = measure(models.PrinterStatus, fresh)
+        schema.set_string_interning(False)
+        label = "full" if fresh else "merged"
+        print(f"{label:>8} {original / 1024:>15.0f} {compact / 1024:>14.0f} "
+              f"{1 - compact / original:>7.0%} {interned / 1024:>15.0f} {1 - interned / original:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Compare PrinterStatus serialization against dataclasses.asdict + json.dumps."""
+from bambu_connect.utils import schema
+from bambu_connect.utils.models import PrinterStatus
+from sample_report import FULL_REPORT
+import dataclasses
+import json
+import timeit
+
+
+def per_call(function, number=2000):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    status = PrinterStatus(**FULL_REPORT)
+    orjson = schema.orjson
+    cases = {
+        "asdict": lambda: dataclasses.asdict(status),
+        "to_dict": lambda: status.to_dict(),
+        "to_dict skip_none": lambda: status.to_dict(skip_none=True),
+        "asdict + json.dumps": lambda: json.dumps(dataclasses.asdict(status)),
+        "to_json (json)": lambda: status.to_json(),
+    }
+    if orjson is not None:
+        cases["to_json (orjson)"] = lambda: status.to_json()
+    try:
+        import msgpack  # noqa: F401
+        cases["to_msgpack"] = lambda: status.to_msgpack()
+    except ImportError:
+        print("msgpack not installed, skipping to_msgpack")
+
+    print(f"{'method':>22} {'us/call':>8}")
+    for name, function in cases.items():
+        # The json row measures the fallback used when orjson is missing
+        schema.orjson = None if name == "to_json (json)" else orjson
+        print(f"{name:>22} {per_call(function):>8.1f}")
+    schema.orjson = orjson
+
+
+if __name__ == "__main__":
+    main()
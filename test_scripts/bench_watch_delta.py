@@ -0,0 +1,35 @@
+"""Compare per-message cost of full PrinterStatus rebuilds, incremental deltas and lazy sections."""
+from bambu_connect.WatchClient import WatchClient
+from sample_report import FULL_REPORT, make_delta
+import json
+import timeit
+
+
+class Message:
+    def __init__(self, doc):
+        self.payload = json.dumps(doc).encode()
+
+
+def per_message(incremental, lazy, delta, number=5000):
+    watch = WatchClient("127.0.0.1", "12345678", "SERIAL", mqtt_client=None)
+    watch.incremental = incremental
+    watch.lazy = lazy
+    watch.on_message(None, None, Message({"print": FULL_REPORT}))
+    message = Message({"print": delta})
+    seconds = timeit.timeit(lambda: watch.on_message(None, None, message), number=number)
+    return seconds / number * 1e6
+
+
+def main():
+    print(f"{'delta keys':>10} {'full (us)':>10} {'incremental (us)':>17} "
+          f"{'lazy full (us)':>15} {'lazy incremental (us)':>22}")
+    deltas = [(str(size), make_delta(size)) for size in (1, 5, 20, 50)]
+    deltas.append(("all", FULL_REPORT))
+    for label, delta in deltas:
+        times = [per_message(incremental, lazy, delta)
+                 for lazy in (False, True) for incremental in (False, True)]
+        print(f"{label:>10} {times[0]:>10.1f} {times[1]:>17.1f} {times[2]:>15.1f} {times[3]:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Local stand-in for a printer's camera port, for trying camera features without a printer.
+
+Serves an endless stream of length-prefixed JPEG-shaped frames over TLS using
+a throwaway self-signed certificate (requires the ``openssl`` command).
+"""
+import os
+import socket
+import ssl
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+
+
+def make_frame(index, size=50000):
+    """Build a fake JPEG payload whose first bytes after SOI encode index."""
+    body = bytes((index + i) & 0xFF for i in range(256)) * (size // 256 + 1)
+    body = body[:size].replace(b"\xff\xd9", b"\xff\x00")
+    return b"\xff\xd8\xff\xe0" + struct.pack("<I", index) + body + b"\xff\xd9"
+
+
+class FakeCameraServer:
+    def __init__(self, host="127.0.0.1", port=0, fps=30, frame_size=50000):
+        self.fps = fps
+        self.frame_size = frame_size
+        self.running = False
+        self.connections = 0
+        self.certdir = tempfile.TemporaryDirectory()
+        cert = os.path.join(self.certdir.name, "cert.pem")
+        key = os.path.join(self.certdir.name, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+             "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+            check=True, capture_output=True,
+        )
+        self.ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.ctx.load_cert_chain(cert, key)
+        self.sock = socket.socket()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(256)
+        self.hostname, self.port = self.sock.getsockname()
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.sock.close()
+        self.certdir.cleanup()
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            with self.ctx.wrap_socket(conn, server_side=True) as ssock:
+                auth = b""
+                while len(auth) < 80:
+                    chunk = ssock.recv(80 - len(auth))
+                    if not chunk:
+                        return
+                    auth += chunk
+                index = 0
+                while self.running:
+                    frame = make_frame(index, self.frame_size)
+                    ssock.sendall(struct.pack("<IIII", len(frame), 0, 1, 0) + frame)
+                    index += 1
+                    time.sleep(1 / self.fps)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=6000)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--frame-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    server = FakeCameraServer(port=args.port, fps=args.fps, frame_size=args.frame_size).start()
+    print(f"Fake camera listening on {server.hostname}:{server.port}", flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
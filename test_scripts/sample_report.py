@@ -0,0 +1,63 @@
+"""Representative printer reports for the benchmark scripts."""
+import copy
+
+
+def _tray(ams_id, tray_id):
+    return {
+        "id": str(tray_id), "remain": 80, "k": 0.02, "n": 1, "cali_idx": -1,
+        "tag_uid": "A1B2C3D4E5F60708", "tray_id_name": "A00-K0", "tray_info_idx": "GFA00",
+        "tray_type": "PLA", "tray_sub_brands": "PLA Basic", "tray_color": "000000FF",
+        "tray_weight": "1000", "tray_diameter": "1.75", "tray_temp": "55", "tray_time": "8",
+        "bed_temp_type": "1", "bed_temp": "35", "nozzle_temp_max": "230",
+        "nozzle_temp_min": "190", "xcam_info": "803E803EE803E8033333333F",
+        "tray_uuid": f"{ams_id:016X}{tray_id:016X}",
+    }
+
+
+FULL_REPORT = {
+    "upload": {"status": "idle", "progress": 0, "message": ""},
+    "nozzle_temper": 219.8, "nozzle_target_temper": 220, "bed_temper": 55.1,
+    "bed_target_temper": 55, "chamber_temper": 5, "mc_print_stage": "2",
+    "heatbreak_fan_speed": "15", "cooling_fan_speed": "15", "big_fan1_speed": "0",
+    "big_fan2_speed": "0", "mc_percent": 42, "mc_remaining_time": 73, "ams_status": 768,
+    "ams_rfid_status": 6, "hw_switch_state": 1, "spd_mag": 100, "spd_lvl": 2,
+    "print_error": 0, "lifecycle": "product", "wifi_signal": "-45dBm",
+    "gcode_state": "RUNNING", "gcode_file_prepare_percent": "100", "queue_number": 0,
+    "queue_total": 0, "queue_est": 0, "queue_sts": 0, "project_id": "123456",
+    "profile_id": "234567", "task_id": "345678", "subtask_id": "456789",
+    "subtask_name": "benchy", "gcode_file": "", "stg": [2, 14, 1], "stg_cur": 0,
+    "print_type": "local", "home_flag": 6296, "mc_print_line_number": "34567",
+    "mc_print_sub_stage": 0, "sdcard": True, "force_upgrade": False,
+    "mess_production_state": "active", "layer_num": 57, "total_layer_num": 240,
+    "s_obj": [], "fan_gear": 0, "hms": [],
+    "online": {"ahb": False, "rfid": False, "version": 7},
+    "ams": {
+        "ams": [
+            {"humidity": "4", "id": str(a), "temp": "24.5",
+             "tray": [_tray(a, t) for t in range(4)]}
+            for a in range(4)
+        ],
+        "ams_exist_bits": "f", "tray_exist_bits": "ffff", "tray_is_bbl_bits": "ffff",
+        "tray_tar": "1", "tray_now": "1", "tray_pre": "1", "tray_read_done_bits": "ffff",
+        "tray_reading_bits": "0", "version": 1234, "insert_flag": True, "power_on_flag": False,
+    },
+    "ipcam": {"ipcam_dev": "1", "ipcam_record": "enable", "timelapse": "disable",
+              "resolution": "1080p", "tutk_server": "disable", "mode_bits": 3},
+    "vt_tray": _tray(254, 254),
+    "lights_report": [{"node": "chamber_light", "mode": "on"}],
+    "upgrade_state": {
+        "sequence_id": 0, "progress": "", "status": "", "consistency_request": False,
+        "dis_state": 0, "err_code": 0, "force_upgrade": False, "message": "",
+        "module": "", "new_version_state": 2, "new_ver_list": [], "cur_state_code": 0,
+        "idx2": 123456789,
+    },
+    "command": "push_status", "msg": 0, "sequence_id": "2021",
+}
+
+
+def make_delta(size):
+    """Return a delta touching roughly size top-level scalar keys, as P1/A1 printers send."""
+    keys = [k for k, v in FULL_REPORT.items() if not isinstance(v, (dict, list))]
+    delta = {k: copy.deepcopy(FULL_REPORT[k]) for k in keys[:size]}
+    delta.update({"command": "push_status", "msg": 1, "sequence_id": "2022"})
+    return delta
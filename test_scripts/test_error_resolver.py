@@ -0,0 +1,83 @@
+from bambu_connect.utils.error_resolver import (
+    ErrorDescriptionResolver, PENDING_DESCRIPTION, UNKNOWN_DESCRIPTION,
+)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import os
+import tempfile
+import threading
+import time
+
+KNOWN_CODES = {"0500C011": "The stand-in knows this error."}
+FAILING_CODES = {"0500EEEE"}  # Answered with HTTP 503, as during an outage
+requests_seen = []
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers like e.bambulab.com/query.php, slowly"""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        code, lang = query["e"][0], query["lang"][0]
+        requests_seen.append(code)
+        time.sleep(1)
+        if code in FAILING_CODES:
+            self.send_response(503)
+            self.end_headers()
+            return
+        errors = [{"ecode": code, "intro": KNOWN_CODES[code]}] if code in KNOWN_CODES else []
+        body = ('{"result": 0, "data": {"device_error": {"%s": %s}}}'
+                % (lang, str(errors).replace("'", '"'))).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/query.php"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "errors.json")
+        resolver = ErrorDescriptionResolver(cache_path=cache_path, api_url=api_url)
+
+        start = time.monotonic()
+        descriptions = [resolver.describe(0x0500C011) for _ in range(100)]
+        print(f"100 describe() calls took {(time.monotonic() - start) * 1000:.1f} ms")
+        assert set(descriptions) == {PENDING_DESCRIPTION}
+
+        threads = [threading.Thread(target=resolver.resolve, args=(0x0500C011,)) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(f"Resolved: {resolver.describe(0x0500C011)!r}")
+        print(f"HTTP requests for the code: {requests_seen.count('0500C011')}")
+
+        assert resolver.resolve(0x0500FFFF) == UNKNOWN_DESCRIPTION
+        resolver.describe(0x0500FFFF)
+        print(f"Negative result cached, requests: {requests_seen.count('0500FFFF')}")
+
+        assert resolver.resolve(0x0500EEEE) == UNKNOWN_DESCRIPTION
+        assert resolver.describe(0x0500EEEE) == PENDING_DESCRIPTION  # Not cached
+        print(f"Failed lookup not cached, requests: {requests_seen.count('0500EEEE')}")
+        assert requests_seen.count("0500EEEE") == 1  # Waits retry_delay
+
+        reloaded = ErrorDescriptionResolver(cache_path=cache_path, api_url=api_url, retry_delay=0)
+        print(f"From disk cache: {reloaded.describe(0x0500C011)!r}")
+        assert len(requests_seen) == 3
+
+        FAILING_CODES.clear()  # The API is back
+        print(f"After the outage: {reloaded.resolve(0x0500EEEE)!r}")
+        assert requests_seen.count("0500EEEE") == 2
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+from bambu_connect.ExecuteClient import ExecuteClient
+from types import SimpleNamespace
+import json
+import paho.mqtt.client as mqtt
+import queue
+import threading
+import time
+
+VERSION_MODULES = [
+    {"name": "ota", "sw_ver": "01.07.00.00", "hw_ver": "", "sn": "01S00A000000000"},
+    {"name": "mc", "sw_ver": "00.00.25.54", "hw_ver": "MC07", "sn": "00M00A000000000"},
+]
+
+
+class FakeMqtt:
+    """Stands in for paho's client: records commands and answers them from a network thread"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.published = []
+        self.silent = set()  # Commands left unanswered
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.execute = None
+        self._lock = threading.Lock()
+        self._replies = queue.Queue()
+        threading.Thread(target=self.__network__, daemon=True).start()
+
+    def publish(self, topic, payload):
+        (section, body), = json.loads(payload).items()
+        with self._lock:
+            self.published.append(body)
+            if body["command"] not in self.silent:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                self._replies.put((time.monotonic() + self.delay, section, body))
+        return SimpleNamespace(rc=mqtt.MQTT_ERR_SUCCESS)
+
+    def commands(self):
+        with self._lock:
+            return [body["command"] for body in self.published]
+
+    def __network__(self):
+        while True:
+            due, section, body = self._replies.get()
+            time.sleep(max(0.0, due - time.monotonic()))
+            reply = {"command": body["command"], "sequence_id": body["sequence_id"],
+                     "result": "success", "reason": ""}
+            if body["command"] == "get_version":
+                reply["module"] = VERSION_MODULES
+            with self._lock:
+                self.in_flight -= 1
+            self.execute.handle_report({section: reply})
+
+
+def client(fake, **kwargs):
+    execute = ExecuteClient("printer", "code", "SERIAL", fake, **kwargs)
+    fake.execute = execute
+    return execute
+
+
+def test_responses():
+    fake = FakeMqtt()
+    execute = client(fake, timeout=0.3)
+
+    response = execute.pause_print().result(1)
+    assert response.ok and response.command == "pause"
+
+    # Caller-supplied ids are replaced, so both commands resolve
+    first = execute.send_command({"print": {"command": "pause", "sequence_id": "0"}})
+    second = execute.send_command({"print": {"command": "resume", "sequence_id": "0"}})
+    assert first.result(1).command == "pause" and second.result(1).command == "resume"
+    sequence_ids = [body["sequence_id"] for body in fake.published]
+    assert len(set(sequence_ids)) == len(sequence_ids)
+
+    versions = execute.get_version().result(1)
+    print(f"Versions: { {name: module.sw_ver for name, module in versions.items()} }")
+    assert versions["ota"].sw_ver == "01.07.00.00" and versions["mc"].hw_ver == "MC07"
+
+    fake.silent.add("stop")
+    start = time.monotonic()
+    try:
+        execute.stop_print().result(2)
+        raise AssertionError("unanswered command did not time out")
+    except TimeoutError:
+        elapsed = time.monotonic() - start
+    print(f"Unanswered command timed out after {elapsed:.2f}s")
+    assert 0.25 < elapsed < 1
+    assert execute.pending == 0
+    execute.close()
+
+
+def test_coalescing():
+    fake = FakeMqtt()
+    execute = client(fake, rate_limit=5, burst=1)
+    execute.set_chamber_light(True)  # Takes the only token
+    speeds = [execute.set_print_speed(str(level)) for level in range(1, 5)]
+    responses = [future.result(2) for future in speeds]
+
+    sent = [body for body in fake.published if body["command"] == "print_speed"]
+    print(f"4 print speed changes, sent: {[body['param'] for body in sent]}")
+    assert len(sent) == 1 and sent[0]["param"] == "4"
+    assert all(response is responses[0] for response in responses)
+    assert execute.coalesced == 3
+    execute.close()
+
+
+def test_stop_first():
+    fake = FakeMqtt()
+    execute = client(fake, rate_limit=2, burst=1)
+    gcode = [execute.send_gcode(f"G1 X{i}") for i in range(5)]
+    time.sleep(0.05)  # The first line takes the token and goes out
+    assert execute.stop_print().result(1).ok
+    time.sleep(1)  # Long enough for two more queued commands to go out
+
+    commands = fake.commands()
+    print(f"Sent: {commands}")
+    assert "gcode_line" not in commands[commands.index("stop"):]
+    assert all(future.cancelled() for future in gcode[1:])
+    assert execute.queue_depth == 0
+    execute.close()
+
+
+def test_batch_window():
+    fake = FakeMqtt(delay=0.02)
+    execute = client(fake)
+    lines = [f"G1 X{i % 200} Y{i % 150} F3000 ; move {i}" for i in range(300)]
+    stats = execute.send_gcode_batch(lines, max_bytes=64, window=3)
+    print(f"{stats.lines} lines in {stats.batches} batches, "
+          f"at most {fake.max_in_flight} waiting for the printer")
+    assert stats.ok and stats.lines == 300
+    assert 1 < fake.max_in_flight <= 3
+
+    published = len(fake.published)
+    try:
+        execute.send_gcode_batch("nonexistent_macro.gcode")
+        raise AssertionError("missing G-code file was not reported")
+    except FileNotFoundError:
+        pass
+    assert len(fake.published) == published
+    execute.close()
+
+
+def main():
+    test_responses()
+    test_coalescing()
+    test_stop_first()
+    test_batch_window()
+    print("All ExecuteClient checks passed")
+
+
+if __name__ == "__main__":
+    main()
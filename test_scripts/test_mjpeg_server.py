@@ -0,0 +1,58 @@
+from bambu_connect.CameraClient import CameraClient
+from bambu_connect.MjpegServer import MjpegServer
+from fake_camera import FakeCameraServer
+import threading
+import time
+import urllib.request
+
+
+def read_parts(url, count):
+    """Read count JPEG parts from an MJPEG stream"""
+    sizes = []
+    with urllib.request.urlopen(url, timeout=10) as response:
+        while len(sizes) < count:
+            line = response.readline()
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+                response.readline()
+                frame = response.read(length)
+                assert frame.startswith(b"\xff\xd8") and frame.endswith(b"\xff\xd9")
+                sizes.append(length)
+    return sizes
+
+
+def main():
+    print("Starting fake camera...")
+    camera = FakeCameraServer(fps=30).start()
+    client = CameraClient(camera.hostname, "12345678", port=camera.port)
+
+    server = MjpegServer({"printer1": client}, host="127.0.0.1", port=0)
+    server.start()
+    base = f"http://127.0.0.1:{server.port}"
+    time.sleep(1)
+
+    try:
+        with urllib.request.urlopen(f"{base}/printer1/snapshot") as response:
+            snapshot = response.read()
+        print(f"Snapshot: {len(snapshot)} bytes")
+
+        print("Reading from 5 viewers at once...")
+        results = []
+        viewers = [
+            threading.Thread(target=lambda: results.append(read_parts(f"{base}/stream", 20)))
+            for _ in range(5)
+        ]
+        for viewer in viewers:
+            viewer.start()
+        for viewer in viewers:
+            viewer.join()
+
+        print(f"Viewers received {[len(r) for r in results]} frames")
+        print(f"Upstream camera connections: {camera.connections}")
+    finally:
+        server.stop()
+        camera.stop()
+
+
+if __name__ == "__main__":
+    main()